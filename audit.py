@@ -0,0 +1,4 @@
+from pricechecker.audit import main
+
+if __name__ == "__main__":
+    main()
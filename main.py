@@ -1,8 +1,8 @@
 import flet as ft
 from pricechecker.app import app
 
-def main(page: ft.Page):
-    app.initialize(page)
+async def main(page: ft.Page):
+    await app.initialize(page)
 
 if __name__ == "__main__":
     ft.app(target=main)
\ No newline at end of file
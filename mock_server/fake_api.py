@@ -1,52 +1,333 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Optional
+import asyncio
+import hashlib
+import json
+import random
+import time
 import uvicorn
-from random import uniform, choice
+from .faults import FAULTS, FaultConfig, RouteFaults, SlowDrip, route_key
+from .price_events import HEARTBEAT_INTERVAL, PRICE_EVENTS, RETRY_MS, format_event
+from .seed_catalog import check_digit, generate_catalog
 
 app = FastAPI()
 
+# Status codes for injected error answers
+INJECTED_STATUS = {"unauthorized": 401, "not_found": 404, "server_error": 500, "unavailable": 503}
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # Lets the client tell backend time from network time
+    started = time.perf_counter()
+    faults = FAULTS.for_route(route_key(request.url.path))
+    if faults is not None:
+        response = await inject_faults(request, call_next, faults)
+    else:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+    return response
+
+async def inject_faults(request: Request, call_next, faults: RouteFaults) -> Response:
+    await FAULTS.delay(faults)
+    kind = faults.errors.pick(FAULTS.rng)
+    if kind in INJECTED_STATUS:
+        return JSONResponse({"detail": f"Injected {kind}"}, status_code=INJECTED_STATUS[kind])
+    if kind == "timeout":
+        await asyncio.sleep(faults.errors.hang)
+    
+    response = await call_next(request)
+    if kind == "reset":
+        return await drop_midway(response)
+    if faults.slow_drip.rate and FAULTS.rng.random() < faults.slow_drip.rate:
+        return await slow_drip(response, faults.slow_drip)
+    return response
+
+async def read_body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+async def slow_drip(response, drip: SlowDrip) -> Response:
+    body = await read_body(response)
+    
+    async def chunks():
+        for i in range(0, len(body), drip.chunk_size):
+            yield body[i:i + drip.chunk_size]
+            await asyncio.sleep(drip.interval)
+    
+    return StreamingResponse(chunks(), status_code=response.status_code, headers=dict(response.headers))
+
+async def drop_midway(response) -> Response:
+    # Headers promise the whole body, the connection closes after half of it
+    body = await read_body(response)
+    
+    async def chunks():
+        yield body[:len(body) // 2]
+        raise ConnectionResetError("Injected connection reset")
+    
+    return StreamingResponse(chunks(), status_code=response.status_code, headers=dict(response.headers))
+
 # Expected API key
 VALID_API_KEY = "12345"
 
+# Maximum number of barcodes in one batch request
+MAX_BATCH_SIZE = 500
+
 # Fake database of products
 FAKE_PRODUCTS = {
-    "12345678900014": {
+    "12345678900012": {
         "name": "Test Product 1",
         "measurement": "pcs",
         "price": 9.99,
-        "discountPrice": 7.99
+        "discountPrice": 7.99,
+        "related": ["98765432145556"]
     },
-    "98765432145555": {
+    "98765432145556": {
         "name": "Test Product 2",
         "measurement": "kg",
         "price": 15.50,
-        "discountPrice": None
+        "discountPrice": None,
+        "related": ["12345678900012"]
     },
     # Add more test products as needed
 }
 
-# Random product generator for unknown barcodes
+# Number of shelf neighbours suggested for prefetch
+RELATED_COUNT = 3
+
+def neighbour_codes(barcode: str, count: int = RELATED_COUNT):
+    """GTIN-14 codes with the next item numbers, standing in for products on the same shelf"""
+    if not barcode.isdigit() or len(barcode) not in (8, 12, 13, 14):
+        return []
+    item = int(barcode.zfill(14)[:-1])
+    codes = []
+    for offset in range(1, count + 1):
+        digits = str(item + offset).zfill(13)[-13:]
+        codes.append(digits + str(check_digit(digits)))
+    return codes
+
+# Random product generator for unknown barcodes, the same product every time for a barcode
 def generate_random_product(barcode: str):
+    rng = random.Random(barcode)
     measurements = ["pcs", "kg", "l", "m"]
     return {
         "name": f"Random Product {barcode[-4:]}",
-        "measurement": choice(measurements),
-        "price": round(uniform(1.0, 100.0), 2),
-        "discountPrice": round(uniform(1.0, 100.0), 2) if choice([True, False]) else None
+        "measurement": rng.choice(measurements),
+        "price": round(rng.uniform(1.0, 100.0), 2),
+        "discountPrice": round(rng.uniform(1.0, 100.0), 2) if rng.choice([True, False]) else None,
+        "related": neighbour_codes(barcode)
     }
 
+# Seeded catalog loaded through /admin/catalog, keyed by GTIN-14
+CATALOG: dict[str, dict] = {}
+CATALOG_SEED = 0
+
+def find_product(barcode: str) -> Optional[dict]:
+    # Return predefined product if exists, generate random product for unknown barcodes
+    if barcode in FAKE_PRODUCTS:
+        return FAKE_PRODUCTS[barcode]
+    # With a seeded catalog loaded, only its products exist
+    if CATALOG:
+        return CATALOG.get(barcode.zfill(14))
+    return generate_random_product(barcode)
+
+def load_catalog(size: int, seed: int = 0):
+    global CATALOG, CATALOG_SEED, LOADED_AT
+    CATALOG = generate_catalog(size, seed)
+    CATALOG_SEED = seed
+    LOADED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+    MODIFIED_AT.clear()
+    # Clients cannot know which of their cached products changed
+    PRICE_EVENTS.reset()
+
+def padded(product: dict, path: str) -> dict:
+    """Product with the payload padding set for this route"""
+    faults = FAULTS.for_route(route_key(path))
+    if faults is None or not faults.padding:
+        return product
+    return {**product, "padding": "x" * faults.padding}
+
+# Products count as last modified at server start or catalog load, unless changed since
+LOADED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+MODIFIED_AT: dict[str, datetime] = {}
+
+def product_etag(product: dict) -> str:
+    body = json.dumps(product, sort_keys=True).encode()
+    return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+def not_modified(etag: str, modified_at: datetime, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if if_modified_since is not None:
+        try:
+            return modified_at <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@app.get("/products")
+async def get_products(codes: str = Query(...), x_api_key: Optional[str] = Header(None)):
+    # Validate API key
+    if x_api_key != VALID_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    barcodes = [code.strip() for code in codes.split(",")]
+    if len(barcodes) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Too many codes (maximum {MAX_BATCH_SIZE})")
+    
+    # One item per requested code, in request order
+    items = []
+    for barcode in barcodes:
+        if not barcode:
+            items.append({"barcode": barcode, "error": "Empty barcode"})
+        elif (product := find_product(barcode)) is None:
+            items.append({"barcode": barcode, "error": "Not found"})
+        else:
+            product = padded(product, "/products")
+            items.append({"barcode": barcode, "product": product, "etag": product_etag(product)})
+    return {"items": items}
+
 @app.get("/products/{barcode}")
-async def get_product(barcode: str, x_api_key: Optional[str] = Header(None)):
+async def get_product(
+    barcode: str,
+    x_api_key: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+):
     # Validate API key
     if x_api_key != VALID_API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
     
-    # Return predefined product if exists
-    if barcode in FAKE_PRODUCTS:
-        return FAKE_PRODUCTS[barcode]
+    product = find_product(barcode)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    product = padded(product, f"/products/{barcode}")
+    etag = product_etag(product)
+    modified_at = MODIFIED_AT.get(barcode, LOADED_AT)
+    headers = {"ETag": etag, "Last-Modified": format_datetime(modified_at, usegmt=True)}
     
-    # Generate random product for unknown barcodes
-    return generate_random_product(barcode)
+    # Conditional request from a client that already holds this version
+    if not_modified(etag, modified_at, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(product, headers=headers)
+
+@app.get("/events/prices")
+async def price_events(
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-sent events, one "price" event per product change:
+    data is {"barcode", "product" (null when removed), "etag"}.
+    Reconnecting with Last-Event-ID resumes after that event; when it is too
+    old to resume, a "reset" event tells the client to drop what it cached.
+    """
+    if x_api_key != VALID_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    try:
+        seq = int(last_event_id) if last_event_id else PRICE_EVENTS.seq
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    
+    async def stream():
+        nonlocal seq
+        yield f"retry: {RETRY_MS}\n\n"
+        while not await request.is_disconnected():
+            events = PRICE_EVENTS.since(seq)
+            if events is None:
+                seq = PRICE_EVENTS.seq
+                yield format_event(seq, "reset", {})
+                continue
+            for seq, event in events:
+                yield format_event(seq, "price", event)
+            if not await PRICE_EVENTS.wait(seq, HEARTBEAT_INTERVAL):
+                # Keeps proxies and the client's read timeout from closing an idle stream
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Runtime control of faults, products and the catalog, for performance testing
+
+class ProductChange(BaseModel):
+    # Fields left out keep their current value
+    name: Optional[str] = None
+    measurement: Optional[str] = None
+    price: Optional[float] = Field(None, ge=0)
+    discountPrice: Optional[float] = Field(None, ge=0)
+
+class CatalogRequest(BaseModel):
+    size: int = Field(0, ge=0, le=1_000_000)  # 0 unloads it, unknown barcodes get random products again
+    seed: int = 0
+
+def check_admin_key(x_api_key: Optional[str]):
+    if x_api_key != VALID_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+@app.get("/admin/faults")
+async def get_faults(x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    return FAULTS.config
+
+@app.put("/admin/faults")
+async def set_faults(config: FaultConfig, x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    try:
+        FAULTS.configure(config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FAULTS.config
+
+@app.delete("/admin/faults")
+async def reset_faults(x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    FAULTS.reset()
+    return FAULTS.config
+
+@app.put("/admin/products/{barcode}")
+async def change_product(barcode: str, change: ProductChange, x_api_key: Optional[str] = Header(None)):
+    """Change a product and announce it on the price stream"""
+    check_admin_key(x_api_key)
+    product = find_product(barcode)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    product = {**product, **change.model_dump(exclude_unset=True)}
+    
+    # Stored where find_product looks first, so random products keep the change too
+    if CATALOG and barcode.zfill(14) in CATALOG:
+        CATALOG[barcode.zfill(14)] = product
+    else:
+        FAKE_PRODUCTS[barcode] = product
+    MODIFIED_AT[barcode] = datetime.now(timezone.utc).replace(microsecond=0)
+    
+    product = padded(product, f"/products/{barcode}")
+    seq = await PRICE_EVENTS.publish(barcode, product, product_etag(product))
+    return {"seq": seq, "product": product}
+
+@app.delete("/admin/products/{barcode}")
+async def remove_product(barcode: str, x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    if FAKE_PRODUCTS.pop(barcode, None) is None and CATALOG.pop(barcode.zfill(14), None) is None:
+        raise HTTPException(status_code=404, detail="Only listed or catalog products can be removed")
+    MODIFIED_AT.pop(barcode, None)
+    seq = await PRICE_EVENTS.publish(barcode, None)
+    return {"seq": seq}
+
+@app.get("/admin/catalog")
+async def get_catalog(x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    return {"size": len(CATALOG), "seed": CATALOG_SEED}
+
+@app.put("/admin/catalog")
+async def set_catalog(request: CatalogRequest, x_api_key: Optional[str] = Header(None)):
+    check_admin_key(x_api_key)
+    load_catalog(request.size, request.seed)
+    await PRICE_EVENTS.notify()
+    return {"size": len(CATALOG), "seed": CATALOG_SEED}
 
 def run_fake_api():
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,135 @@
+"""
+Fault injection for the fake API: per-route latency distributions, error
+rates, slow-drip bodies and padded payloads. Set at runtime through the
+/admin/faults endpoint or from Python with configure().
+
+Example (PUT /admin/faults):
+
+    {
+        "seed": 42,
+        "routes": {
+            "/products/{barcode}": {
+                "latency": {"distribution": "lognormal", "mean": 0.08, "spread": 0.6},
+                "errors": {"unavailable": 0.02, "timeout": 0.01, "reset": 0.01},
+                "slow_drip": {"rate": 0.05, "chunk_size": 8, "interval": 0.1}
+            },
+            "*": {"latency": {"distribution": "fixed", "mean": 0.02}}
+        }
+    }
+"""
+import asyncio
+import math
+import random
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+# Routes faults can be set for; "*" applies to routes without their own entry
+ROUTES = ("/products/{barcode}", "/products")
+DEFAULT_ROUTE = "*"
+
+ERROR_KINDS = ("unauthorized", "not_found", "server_error", "unavailable", "timeout", "reset")
+
+
+class Latency(BaseModel):
+    """Added delay; `mean` and `spread` are in seconds (lognormal: median and sigma)"""
+    distribution: Literal["none", "fixed", "uniform", "normal", "lognormal", "exponential"] = "none"
+    mean: float = Field(0.0, ge=0)
+    spread: float = Field(0.0, ge=0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.mean
+        if self.distribution == "uniform":
+            return rng.uniform(max(self.mean - self.spread, 0), self.mean + self.spread)
+        if self.distribution == "normal":
+            return max(rng.gauss(self.mean, self.spread), 0.0)
+        if self.distribution == "lognormal" and self.mean > 0:
+            return rng.lognormvariate(math.log(self.mean), self.spread)
+        if self.distribution == "exponential" and self.mean > 0:
+            return rng.expovariate(1 / self.mean)
+        return 0.0
+
+
+class ErrorRates(BaseModel):
+    """Share of requests failing each way, at most 1 in total"""
+    unauthorized: float = Field(0.0, ge=0, le=1)  # 401
+    not_found: float = Field(0.0, ge=0, le=1)  # 404
+    server_error: float = Field(0.0, ge=0, le=1)  # 500
+    unavailable: float = Field(0.0, ge=0, le=1)  # 503
+    timeout: float = Field(0.0, ge=0, le=1)  # no answer for `hang` seconds
+    reset: float = Field(0.0, ge=0, le=1)  # connection dropped mid-response
+    hang: float = Field(30.0, ge=0)
+
+    @model_validator(mode="after")
+    def check_total(self):
+        if sum(getattr(self, kind) for kind in ERROR_KINDS) > 1:
+            raise ValueError("Error rates add up to more than 1")
+        return self
+
+    def pick(self, rng: random.Random) -> Optional[str]:
+        roll = rng.random()
+        for kind in ERROR_KINDS:
+            roll -= getattr(self, kind)
+            if roll < 0:
+                return kind
+        return None
+
+
+class SlowDrip(BaseModel):
+    """Send the body `chunk_size` bytes at a time, `interval` seconds apart"""
+    rate: float = Field(0.0, ge=0, le=1)
+    chunk_size: int = Field(16, ge=1)
+    interval: float = Field(0.05, ge=0)
+
+
+class RouteFaults(BaseModel):
+    latency: Latency = Latency()
+    errors: ErrorRates = ErrorRates()
+    slow_drip: SlowDrip = SlowDrip()
+    # Extra bytes added to each product payload
+    padding: int = Field(0, ge=0)
+
+
+class FaultConfig(BaseModel):
+    seed: Optional[int] = None
+    routes: dict[str, RouteFaults] = {}
+
+
+class Faults:
+    """Current fault config and the random source all fault decisions come from"""
+
+    def __init__(self):
+        self.configure(FaultConfig())
+
+    def configure(self, config: FaultConfig):
+        unknown = set(config.routes) - set(ROUTES) - {DEFAULT_ROUTE}
+        if unknown:
+            raise ValueError(f"Unknown routes: {', '.join(sorted(unknown))}")
+        self.config = config
+        # Seeded runs make the same decisions for the same request sequence
+        self.rng = random.Random(config.seed)
+
+    def reset(self):
+        self.configure(FaultConfig())
+
+    def for_route(self, route: Optional[str]) -> Optional[RouteFaults]:
+        if route is None:
+            return None
+        return self.config.routes.get(route) or self.config.routes.get(DEFAULT_ROUTE)
+
+    async def delay(self, faults: RouteFaults):
+        seconds = faults.latency.sample(self.rng)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+def route_key(path: str) -> Optional[str]:
+    """Route template for a request path, None for routes faults never apply to"""
+    if path == "/products":
+        return "/products"
+    if path.startswith("/products/"):
+        return "/products/{barcode}"
+    return None
+
+
+FAULTS = Faults()
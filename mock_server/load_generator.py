@@ -0,0 +1,252 @@
+"""
+Headless load generator: N simulated terminals scanning through APIClient.
+
+Each terminal has its own APIClient (connection pool and cache) and scans in
+bursts, like a customer's basket: items are drawn from a Zipf distribution over
+the catalog, and some scans repeat the previous item.
+
+    python -m mock_server.load_generator --terminals 20 --duration 30
+    python -m mock_server.load_generator --latency 0.05 --error-rate 0.02 --json report.json
+    python -m mock_server.load_generator --url http://192.168.1.10:8000 --api-key ...
+
+Without --url a fake API is started in-process with a seeded catalog of --items
+products, and --latency / --error-rate are injected into it. --faults loads a
+fault config (see mock_server/faults.py) into the in-process fake API, or into
+a remote one through its /admin/faults endpoint.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from pricechecker.api_client import APIClient
+from pricechecker.handlers import handle_scan
+from pricechecker.metrics import percentile
+from .seed_catalog import catalog_codes
+
+
+class ZipfSampler:
+    """Draws catalog items so that the k-th most popular one is picked with weight 1/k^s"""
+
+    def __init__(self, items: list[str], s: float, rng: random.Random):
+        self.items = items
+        self.rng = rng
+        total = 0.0
+        self.cum_weights = []
+        for rank in range(1, len(items) + 1):
+            total += 1 / rank ** s
+            self.cum_weights.append(total)
+
+    def sample(self) -> str:
+        index = bisect.bisect_left(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+        return self.items[min(index, len(self.items) - 1)]
+
+
+class QuietAPIClient(APIClient):
+    """APIClient without per-request debug output, which would flood the report"""
+
+    async def show_debug(self, message: str):
+        pass
+
+
+@dataclass
+class TerminalResult:
+    latencies: list[float] = field(default_factory=list)
+    scans: int = 0
+    errors: int = 0
+    stats: dict = field(default_factory=dict)
+
+
+async def run_terminal(
+    terminal: int,
+    args: argparse.Namespace,
+    codes: list[str],
+    deadline: float,
+) -> TerminalResult:
+    rng = random.Random(args.seed + terminal)
+    sampler = ZipfSampler(codes, args.zipf, rng)
+    client_class = APIClient if args.verbose else QuietAPIClient
+    client = client_class(args.url, args.api_key, prefetch=args.prefetch)
+    result = TerminalResult()
+    last_code: Optional[str] = None
+
+    async def pause(seconds: float):
+        await asyncio.sleep(max(0.0, min(seconds, deadline - time.monotonic())))
+
+    # Terminals do not start in lockstep
+    await pause(rng.uniform(0, args.think))
+    try:
+        while time.monotonic() < deadline:
+            # One basket: a burst of scans close together
+            burst = 1 + int(rng.expovariate(1 / args.burst)) if args.burst > 0 else 1
+            for _ in range(burst):
+                if time.monotonic() >= deadline:
+                    break
+                if last_code is not None and rng.random() < args.repeat:
+                    code = last_code
+                else:
+                    code = sampler.sample()
+                last_code = code
+
+                # Same path as the app: validate and normalize, then look up
+                started = time.perf_counter()
+                scan_code, error = handle_scan(code)
+                if not error:
+                    product, error = await client.get_product_info(scan_code)
+                result.latencies.append(time.perf_counter() - started)
+                result.scans += 1
+                if error:
+                    result.errors += 1
+
+                if args.scan_gap > 0:
+                    await pause(rng.expovariate(1 / args.scan_gap))
+            if args.think > 0:
+                await pause(rng.expovariate(1 / args.think))
+    finally:
+        result.stats = client.stats()
+        await client.aclose()
+    return result
+
+
+def fault_config(args: argparse.Namespace) -> Optional[dict]:
+    """Fault config from --faults, or one built from --latency / --error-rate"""
+    if args.faults:
+        with open(args.faults, encoding="utf-8") as f:
+            return json.load(f)
+    if args.latency or args.error_rate:
+        return {
+            "seed": args.seed,
+            "routes": {"*": {
+                "latency": {"distribution": "exponential", "mean": args.latency},
+                "errors": {"unavailable": args.error_rate},
+            }},
+        }
+    return None
+
+
+def start_fake_api(args: argparse.Namespace) -> str:
+    """Run the fake API in a background thread on a free port; returns its URL"""
+    import uvicorn
+    from . import fake_api
+    from .faults import FAULTS, FaultConfig
+
+    fake_api.load_catalog(args.items, args.seed)
+    faults = fault_config(args)
+    if faults is not None:
+        FAULTS.configure(FaultConfig.model_validate(faults))
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(fake_api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def summarize(results: list[TerminalResult], elapsed: float) -> dict:
+    latencies = sorted(latency for r in results for latency in r.latencies)
+    scans = sum(r.scans for r in results)
+    totals: dict[str, float] = {}
+    for r in results:
+        for key, value in r.stats.items():
+            if isinstance(value, (int, float)) and not key.endswith("_rate"):
+                totals[key] = totals.get(key, 0) + value
+    lookups = totals.get("cache_hits", 0) + totals.get("cache_misses", 0)
+
+    return {
+        "terminals": len(results),
+        "duration_s": round(elapsed, 2),
+        "scans": scans,
+        "errors": sum(r.errors for r in results),
+        "throughput_scans_per_s": round(scans / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "cache_hit_rate": round(totals.get("cache_hits", 0) / lookups, 3) if lookups else 0.0,
+        "circuits_open": sum(1 for r in results if r.stats.get("circuit") != "closed"),
+        **{key: int(value) for key, value in totals.items() if not key.startswith("cache_")},
+    }
+
+
+def print_report(report: dict):
+    latency = report["latency_ms"]
+    print(f"terminals        {report['terminals']}")
+    print(f"duration         {report['duration_s']} s")
+    print(f"scans            {report['scans']} ({report['errors']} errors)")
+    print(f"throughput       {report['throughput_scans_per_s']} scans/s")
+    print(f"latency ms       p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"cache hit rate   {report['cache_hit_rate']:.1%}")
+    print(f"connections      {report['connections_opened']} opened / {report['connections_reused']} reused")
+    print(
+        f"resilience       {report['retries']} retries, {report['hedged_requests']} hedged, "
+        f"{report['fast_failures']} fast failures, {report['circuits_open']} circuits open"
+    )
+    print(f"revalidation     {report['not_modified']} not modified, {report['bytes_received']} bytes received")
+
+
+async def run(args: argparse.Namespace) -> dict:
+    codes = catalog_codes(args.items)
+    started = time.monotonic()
+    deadline = started + args.duration
+    results = await asyncio.gather(
+        *(run_terminal(terminal, args, codes, deadline) for terminal in range(args.terminals))
+    )
+    return summarize(results, time.monotonic() - started)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate scanning terminals against the product API")
+    parser.add_argument("--url", help="API base URL (default: start the fake API in-process)")
+    parser.add_argument("--api-key", default="12345")
+    parser.add_argument("--terminals", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--items", type=int, default=5000, help="catalog size")
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew, higher means fewer hot items")
+    parser.add_argument("--repeat", type=float, default=0.1, help="chance a scan repeats the previous item")
+    parser.add_argument("--burst", type=float, default=4.0, help="mean extra scans per basket")
+    parser.add_argument("--scan-gap", type=float, default=0.3, help="mean seconds between scans in a basket")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between baskets")
+    parser.add_argument("--prefetch", action="store_true", help="enable predictive prefetch")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean injected server latency, in-process fake API")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="injected 503 rate, in-process fake API")
+    parser.add_argument("--faults", help="fault config JSON file for the fake API")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="print APIClient debug messages")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.url:
+        args.url = start_fake_api(args)
+    elif args.faults:
+        with open(args.faults, encoding="utf-8") as f:
+            response = httpx.put(f"{args.url}/admin/faults", json=json.load(f), headers={"x-api-key": args.api_key})
+        response.raise_for_status()
+    elif args.latency or args.error_rate:
+        print("--latency and --error-rate only apply to the in-process fake API, ignoring them")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
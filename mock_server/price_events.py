@@ -0,0 +1,83 @@
+"""
+Price-change event log behind the fake API's /events/prices stream.
+
+Every change gets the next sequence number, which is also the SSE event id.
+The last BUFFER_SIZE events are kept so a client that reconnects with
+Last-Event-ID gets what it missed; one that fell further behind gets a
+"reset" event and has to treat everything it cached as stale.
+"""
+import asyncio
+import json
+from collections import deque
+from typing import Optional
+
+# Events kept for clients resuming after a disconnect
+BUFFER_SIZE = 10_000
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+
+# Reconnect delay suggested to clients, milliseconds
+RETRY_MS = 1000
+
+
+class PriceEventLog:
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self.seq = 0
+        self.events: deque[tuple[int, dict]] = deque(maxlen=buffer_size)
+        self._changed: Optional[asyncio.Condition] = None
+
+    @property
+    def changed(self) -> asyncio.Condition:
+        # Created on first use, inside the server's event loop
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def publish(self, barcode: str, product: Optional[dict], etag: Optional[str] = None) -> int:
+        """Record a change; `product` None means the product was removed"""
+        self.seq += 1
+        self.events.append((self.seq, {"barcode": barcode, "product": product, "etag": etag}))
+        await self.notify()
+        return self.seq
+
+    async def notify(self):
+        """Wake up the open streams"""
+        async with self.changed:
+            self.changed.notify_all()
+
+    def since(self, seq: int) -> Optional[list[tuple[int, dict]]]:
+        """Events after `seq`, None if some of them already left the buffer"""
+        if seq == self.seq:
+            return []
+        # An id from before a server restart cannot be resumed either
+        if seq > self.seq:
+            return None
+        oldest = self.events[0][0] if self.events else self.seq + 1
+        if seq + 1 < oldest:
+            return None
+        return [(event_seq, event) for event_seq, event in self.events if event_seq > seq]
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until there are events after `seq`; False on timeout"""
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait_for(lambda: self.seq > seq), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def reset(self):
+        """
+        Forget all events, e.g. after the catalog was replaced. Every client is
+        behind afterwards and gets a "reset" event (open streams once notified).
+        """
+        self.seq += 1
+        self.events.clear()
+
+
+def format_event(event_id: int, event: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+PRICE_EVENTS = PriceEventLog()
@@ -0,0 +1,49 @@
+"""Deterministic product catalogs for the fake API and the load generator"""
+import random
+
+# Prefix for generated catalog codes (EAN-13, item number in the next 9 digits)
+CODE_PREFIX = "482"
+
+MEASUREMENTS = ["pcs", "kg", "l", "m"]
+WORDS = [
+    "Milk", "Bread", "Butter", "Cheese", "Apple", "Juice", "Coffee", "Tea", "Rice", "Pasta",
+    "Sugar", "Salt", "Flour", "Yogurt", "Honey", "Soap", "Water", "Oil", "Eggs", "Chocolate",
+]
+
+
+def check_digit(digits: str) -> int:
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return (10 - total % 10) % 10
+
+
+def catalog_code(item: int) -> str:
+    digits = CODE_PREFIX + str(item).zfill(9)
+    return digits + str(check_digit(digits))
+
+
+def catalog_codes(size: int) -> list[str]:
+    """Valid EAN-13 codes for item numbers 1..size"""
+    return [catalog_code(item) for item in range(1, size + 1)]
+
+
+def generate_catalog(size: int, seed: int = 0) -> dict[str, dict]:
+    """
+    `size` products keyed by GTIN-14, the same for the same seed.
+    Neighbouring item numbers are listed as related (same shelf).
+    """
+    rng = random.Random(seed)
+    catalog = {}
+    for item in range(1, size + 1):
+        price = round(rng.uniform(1.0, 100.0), 2)
+        catalog[catalog_code(item).zfill(14)] = {
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS).lower()} #{item}",
+            "measurement": rng.choice(MEASUREMENTS),
+            "price": price,
+            "discountPrice": round(price * rng.uniform(0.6, 0.95), 2) if rng.random() < 0.2 else None,
+            "related": [
+                catalog_code(neighbour).zfill(14)
+                for neighbour in (item - 1, item + 1)
+                if 1 <= neighbour <= size
+            ],
+        }
+    return catalog
@@ -1,43 +1,749 @@
 import httpx
-from typing import Optional
-from .models import ProductInfo
+import importlib.util
+import json
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+from .models import ProductInfo, decode_product, decode_products
+from .cache import ProductCache
+from .catalog import ProductCatalog
+from .history import HistoryStore
+from .scan_queue import ScanQueue
+from .barcode import normalize_code
+from .metrics import LatencyMetrics, parse_server_timing
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED
+from . import config
 import flet as ft
 from datetime import datetime
+from decimal import Decimal
 import asyncio
 
+# HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Gateway errors worth another attempt, the request did not reach a healthy backend
+RETRY_STATUS_CODES = {502, 503, 504}
+
+def _server_answered(error: Exception) -> bool:
+    """True if the API itself rejected the request (4xx), so the local catalog must not answer instead"""
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500
+
+def _backend_failed(error: Exception) -> bool:
+    """Connection errors, timeouts and 5xx answers count against the circuit breaker"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+def _retryable(error: Exception) -> bool:
+    """Lookups are idempotent GETs; retry only failures another attempt can fix"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+def _stream_rejected(status_code: int) -> bool:
+    """4xx other than timeout and rate limiting: the stream is not available to this terminal"""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter, so terminals do not retry in lockstep"""
+    return random.uniform(0, min(config.RETRY_BACKOFF_MAX, config.RETRY_BACKOFF * 2 ** attempt))
+
+async def _sse_events(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """Parse a server-sent event stream into {"id", "event", "data", "retry"} dicts"""
+    event: dict = {}
+    async for line in lines:
+        if not line:
+            if event:
+                yield event
+                event = {}
+            continue
+        if line.startswith(":"):
+            # Comment, used as keep-alive
+            continue
+        field, _, value = line.partition(":")
+        value = value.removeprefix(" ")
+        if field == "data":
+            event["data"] = f"{event['data']}\n{value}" if "data" in event else value
+        elif field in ("id", "event", "retry"):
+            event[field] = value
+
 class APIClient:
-    def __init__(self, base_url: str, api_key: str, status_text: Optional[ft.Text] = None):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        status_text: Optional[ft.Text] = None,
+        http2: bool = config.HTTP2,
+        max_connections: int = config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = config.HTTP_KEEPALIVE_EXPIRY,
+        cache: Optional[ProductCache] = None,
+        catalog: Optional[ProductCatalog] = None,
+        metrics: Optional[LatencyMetrics] = None,
+        history_store: Optional[HistoryStore] = None,
+        prefetch: bool = config.PREFETCH_ENABLED,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = config.HEDGE_ENABLED,
+        retry_attempts: int = config.RETRY_ATTEMPTS,
+        scan_queue: Optional[ScanQueue] = None,
+    ):
         self.base_url = base_url
         self.api_key = api_key
         self.status_text = status_text
         self.debug_messages = []
-        
+        self.cache = cache if cache is not None else ProductCache()
+        self.catalog = catalog
+        self.metrics = metrics if metrics is not None else LatencyMetrics()
+        self.history_store = history_store
+        self.scan_queue = scan_queue
+        self.breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.hedge_enabled = hedge
+        self.retry_attempts = retry_attempts
+
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Connection counters
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+        # Resilience counters
+        self.retries = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.fast_failures = 0
+
+        # Conditional request counters
+        self.not_modified = 0
+        self.bytes_received = 0
+
+        # Prefetch runs only while no scan lookup is waiting on the network
+        self.prefetch_enabled = prefetch
+        self._prefetch_tasks: deque[asyncio.Task] = deque()
+        self._lookups_in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # Codes warmed by prefetch that no scan has used yet
+        self._prefetched: set[str] = set()
+        # Codes a prefetch request is fetching right now
+        self._prefetching: set[str] = set()
+        self.prefetch_requests = 0
+        self.prefetch_hits = 0
+
+        # Price-change subscription; while it is live, cached prices are kept longer
+        self._stream_task: Optional[asyncio.Task] = None
+        self.stream_live = False
+        self.last_event_id: Optional[str] = None
+        self._stream_retry = 1.0
+        self._cache_ttl = self.cache.ttl
+        self.price_events = 0
+        self.stream_reconnects = 0
+        # Called with (barcode, product or None when removed) for each applied change
+        self.on_price_change: Optional[Callable[[str, Optional[ProductInfo]], None]] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on first use and kept for the client's lifetime"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    config.HTTP_TIMEOUT,
+                    connect=config.HTTP_CONNECT_TIMEOUT,
+                    read=config.HTTP_READ_TIMEOUT,
+                ),
+                verify=False,
+                follow_redirects=True,
+                http2=self.http2,
+                limits=self.limits,
+            )
+        return self._client
+
+    def stats(self) -> dict:
+        return {
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "prefetch_requests": self.prefetch_requests,
+            "prefetch_hits": self.prefetch_hits,
+            "retries": self.retries,
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            "fast_failures": self.fast_failures,
+            "not_modified": self.not_modified,
+            "bytes_received": self.bytes_received,
+            "circuit": self.breaker.state,
+            "price_events": self.price_events,
+            "stream_reconnects": self.stream_reconnects,
+            "price_stream": (
+                "off" if self._stream_task is None or self._stream_task.done()
+                else "live" if self.stream_live else "down"
+            ),
+            **self.cache.stats(),
+        }
+
+    def stats_line(self) -> str:
+        """One-line summary for the debug status line"""
+        stats = self.stats()
+        line = (
+            f"cache {stats['cache_hits']} hit / {stats['cache_misses']} miss "
+            f"({stats['cache_size']} items) | "
+            f"conn {stats['connections_opened']} new / {stats['connections_reused']} reused | "
+            f"prefetch {stats['prefetch_hits']} hit | "
+            f"retry {stats['retries']} / hedge {stats['hedged_requests']}"
+        )
+        if stats["circuit"] != CLOSED:
+            line += f" | circuit {stats['circuit']}"
+        if stats["price_stream"] != "off":
+            line += f" | push {stats['price_stream']} ({stats['price_events']})"
+        return line
+
+    async def aclose(self):
+        """Close pooled connections"""
+        self.cancel_prefetch()
+        await self.stop_price_stream()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            await self.show_debug(
+                f"HTTP client closed (opened: {self.connections_opened}, reused: {self.connections_reused})"
+            )
+        self._client = None
+
     async def show_debug(self, message: str):
         # Only print debug messages, don't show in UI
         print(f"[DEBUG] {message}")
-        
+
     async def show_status(self, message: str, is_error: bool = False):
         if self.status_text:
             self.status_text.value = message
             self.status_text.color = "red" if is_error else "green"
             self.status_text.visible = True
             self.status_text.update()
-        
-    async def get_product_info(self, scan_code: str) -> tuple[Optional[ProductInfo], Optional[str]]:
+
+    async def _get(self, url: str, headers: dict, params: Optional[dict] = None) -> httpx.Response:
+        # httpcore trace events, e.g. "connection.connect_tcp.started" -> perf_counter()
+        events: dict[str, float] = {}
+
+        async def trace(event_name: str, info: dict):
+            events[event_name] = time.perf_counter()
+
+        response = await self.client.get(url, headers=headers, params=params, extensions={"trace": trace})
+        self.bytes_received += len(response.content)
+
+        # Track whether the request had to open a new connection
+        if "connection.connect_tcp.complete" in events:
+            self.connections_opened += 1
+        else:
+            self.connections_reused += 1
+        self.record_network_timings(events, response)
+        return response
+
+    def record_network_timings(self, events: dict[str, float], response: httpx.Response):
+        """Split one request into connect/TLS/response time, and server vs network time"""
+        def span(start: str, end: str) -> Optional[float]:
+            if start in events and end in events:
+                return events[end] - events[start]
+            return None
+
+        connect = span("connection.connect_tcp.started", "connection.connect_tcp.complete")
+        if connect is not None:
+            self.metrics.record("connect", connect)
+        tls = span("connection.start_tls.started", "connection.start_tls.complete")
+        if tls is not None:
+            self.metrics.record("tls", tls)
+
+        http = "http2" if "http2.send_request_headers.started" in events else "http11"
+        waited = span(f"{http}.send_request_headers.started", f"{http}.receive_response_headers.complete")
+        if waited is not None:
+            self.metrics.record("response", waited)
+            server = parse_server_timing(response.headers.get("server-timing"))
+            if server is not None:
+                self.metrics.record("server", server)
+                self.metrics.record("network", max(waited - server, 0.0))
+
+    async def get_product_info(
+        self, scan_code: str, use_cache: bool = True, queue_offline: bool = True
+    ) -> tuple[Optional[ProductInfo], Optional[str]]:
+        """
+        Price one scan. With `queue_offline` a scan nothing could answer is kept
+        in the scan queue and resynced later; lookups whose results do not belong
+        in the customer history (e.g. stock audits) turn it off.
+        """
+        # Serve repeat scans from the local cache without touching the network
+        if use_cache:
+            with self.metrics.measure("cache"):
+                cached = self.cache.get(scan_code)
+            if cached is not None:
+                if scan_code in self._prefetched:
+                    self._prefetched.discard(scan_code)
+                    self.prefetch_hits += 1
+                self.schedule_prefetch(scan_code, cached)
+                return cached, None
+
+        self._lookup_started()
+        started = time.perf_counter()
+        # Retries and hedges must fit in the scan's latency budget
+        deadline = asyncio.get_running_loop().time() + config.SCAN_LATENCY_BUDGET
+        fetch = asyncio.ensure_future(self._fetch_product(scan_code, deadline))
+        fetch.add_done_callback(
+            lambda f: f.cancelled() or f.exception() or self.metrics.record("api", time.perf_counter() - started)
+        )
         try:
-            url = f"{self.base_url}/products/{scan_code}"
-            headers = {"x-api-key": self.api_key} if self.api_key else {}
-            
-            async with httpx.AsyncClient(
-                timeout=30.0,
-                verify=False,
-                follow_redirects=True
-            ) as client:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                return ProductInfo.from_dict(response.json()), None
-                
+            if self.catalog is not None:
+                # Answer from the local catalog if the API is slow
+                done, _ = await asyncio.wait({fetch}, timeout=config.CATALOG_FALLBACK_AFTER)
+                if not done:
+                    product = self.catalog_lookup(scan_code)
+                    if product is not None:
+                        await self.show_debug(f"API slow, answered {scan_code} from catalog")
+                        # Let the request finish in the background to warm the cache
+                        fetch.add_done_callback(lambda f: f.cancelled() or f.exception())
+                        return product, None
+
+            done, _ = await asyncio.wait({fetch}, timeout=max(deadline - asyncio.get_running_loop().time(), 0))
+            if not done:
+                fetch.cancel()
+                raise TimeoutError(f"No answer within {config.SCAN_LATENCY_BUDGET:g} s")
+            product = fetch.result()
+            self.schedule_prefetch(scan_code, product)
+            return product, None
+
+        except asyncio.CancelledError:
+            fetch.cancel()
+            raise
+
         except Exception as e:
+            # Fall back to the local catalog when the API is down
+            product = None if _server_answered(e) else self.catalog_lookup(scan_code)
+            if product is not None:
+                await self.show_debug(f"API error ({e}), answered {scan_code} from catalog")
+                return product, None
+
             error = f"Error: {str(e)}"
+            # Nothing answered at all: keep the scan and look it up again later
+            if queue_offline and self.scan_queue is not None and not _server_answered(e):
+                try:
+                    # SQLite write, kept off the event loop
+                    await asyncio.to_thread(self.scan_queue.add, scan_code)
+                except Exception as queue_error:
+                    print(f"Error queueing scan: {queue_error}")
             await self.show_status(error, is_error=True)
-            return None, error 
\ No newline at end of file
+            return None, error
+
+        finally:
+            self._lookup_finished()
+
+    def _lookup_started(self):
+        self._lookups_in_flight += 1
+        self._idle.clear()
+
+    def _lookup_finished(self):
+        self._lookups_in_flight -= 1
+        if self._lookups_in_flight == 0:
+            self._idle.set()
+
+    def predict_next(self, scan_code: str, product: ProductInfo) -> list[str]:
+        """Likely next scans: related codes from the API first, then what followed this code in history"""
+        codes = [normalize_code(code) for code in product.related]
+        if self.history_store is not None and len(codes) < config.PREFETCH_MAX_CODES:
+            try:
+                codes += self.history_store.scanned_after(scan_code, config.PREFETCH_MAX_CODES)
+            except Exception as e:
+                print(f"Error reading history: {e}")
+
+        # Skip the scanned code, everything already fresh in the cache and codes
+        # an earlier prefetch is still fetching (a repeat scan would send them again)
+        predicted = []
+        for code in dict.fromkeys(codes):
+            cached = self.cache.peek(code)
+            if code != scan_code and code not in self._prefetching and not (cached and cached[1]):
+                predicted.append(code)
+        return predicted[:config.PREFETCH_MAX_CODES]
+
+    def schedule_prefetch(self, scan_code: str, product: ProductInfo) -> Optional[asyncio.Task]:
+        """Warm the cache with the likely next scans in the background"""
+        if not self.prefetch_enabled:
+            return None
+        task = asyncio.ensure_future(self._prefetch(scan_code, product))
+        self._prefetch_tasks.append(task)
+        task.add_done_callback(self._prefetch_done)
+
+        # Predictions for older scans matter least, cancel them beyond the cap
+        while len(self._prefetch_tasks) > config.PREFETCH_CONCURRENCY:
+            self._prefetch_tasks.popleft().cancel()
+        return task
+
+    def _prefetch_done(self, task: asyncio.Task):
+        if task in self._prefetch_tasks:
+            self._prefetch_tasks.remove(task)
+
+    def cancel_prefetch(self):
+        while self._prefetch_tasks:
+            self._prefetch_tasks.popleft().cancel()
+
+    async def _prefetch(self, scan_code: str, product: ProductInfo):
+        # Low priority: start only once no scan is waiting on the network
+        await self._idle.wait()
+        codes = self.predict_next(scan_code, product)
+        if not codes:
+            return
+
+        self._prefetching.update(codes)
+        try:
+            self.prefetch_requests += 1
+            results = await self._fetch_products(codes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.show_debug(f"Prefetch after {scan_code} failed: {e}")
+            return
+        finally:
+            self._prefetching.difference_update(codes)
+
+        self._prefetched.update(code for code, (found, _) in results.items() if found is not None)
+        # Forget warmed codes that were evicted before anyone scanned them
+        if len(self._prefetched) > self.cache.max_size:
+            self._prefetched = {code for code in self._prefetched if code in self.cache}
+        await self.show_debug(f"Prefetched {len(codes)} codes after {scan_code}")
+
+    def start_price_stream(self) -> asyncio.Task:
+        """Subscribe to price changes in the background, reconnecting until stopped"""
+        if self._stream_task is None or self._stream_task.done():
+            self._stream_task = asyncio.ensure_future(self._price_stream())
+        return self._stream_task
+
+    async def stop_price_stream(self):
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            try:
+                await self._stream_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._stream_task = None
+        self._stream_lost()
+
+    async def _price_stream(self):
+        attempt = 0
+        while True:
+            try:
+                await self._follow_price_stream()
+                error = "closed by server"
+            except asyncio.CancelledError:
+                raise
+            except httpx.HTTPStatusError as e:
+                # No such endpoint, wrong key: reconnecting will not help, the short cache TTL stays
+                if _stream_rejected(e.response.status_code):
+                    self._stream_lost()
+                    print(f"Price stream rejected with {e.response.status_code}, push updates off")
+                    return
+                error = repr(e)
+            except Exception as e:
+                error = repr(e)
+            if self.stream_live:
+                attempt = 0
+            self._stream_lost()
+
+            # Full jitter, so a fleet does not reconnect in lockstep after a server restart
+            delay = random.uniform(0, min(config.PRICE_STREAM_RECONNECT_MAX, self._stream_retry * 2 ** attempt))
+            attempt += 1
+            self.stream_reconnects += 1
+            await self.show_debug(f"Price stream {error}, reconnecting in {delay:.1f} s")
+            await asyncio.sleep(delay)
+
+    async def _follow_price_stream(self):
+        url = f"{self.base_url}/events/prices"
+        headers = {"Accept": "text/event-stream"}
+        if self.api_key:
+            headers["x-api-key"] = self.api_key
+        # Resume right after the last change applied
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+
+        timeout = httpx.Timeout(
+            config.HTTP_TIMEOUT,
+            connect=config.HTTP_CONNECT_TIMEOUT,
+            read=config.PRICE_STREAM_READ_TIMEOUT,
+        )
+        async with self.client.stream("GET", url, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            self.stream_live = True
+            self.cache.ttl = config.CACHE_TTL_STREAMING
+            await self.show_debug(f"Price stream connected (after event {self.last_event_id})")
+            async for event in _sse_events(response.aiter_lines()):
+                self.apply_price_event(event)
+
+    def _stream_lost(self):
+        # Changes may be missed from now on, fall back to the short TTL
+        if self.stream_live:
+            self.stream_live = False
+            self.cache.ttl = self._cache_ttl
+            self.cache.cap_ttl(self._cache_ttl)
+
+    def apply_price_event(self, event: dict):
+        if "retry" in event and event["retry"].isdigit():
+            self._stream_retry = int(event["retry"]) / 1000
+
+        kind = event.get("event", "message")
+        if kind == "reset":
+            # Too far behind to resume: anything cached may be outdated, revalidate on next scan
+            self.cache.cap_ttl(0)
+        elif kind == "price":
+            try:
+                data = json.loads(event["data"], parse_float=Decimal)
+                self.apply_price_change(normalize_code(data["barcode"]), data.get("product"), data.get("etag"))
+            except Exception as e:
+                print(f"Error applying price change: {e}")
+        if "id" in event:
+            self.last_event_id = event["id"]
+
+    def apply_price_change(self, barcode: str, data: Optional[dict], etag: Optional[str] = None):
+        product = ProductInfo.from_dict(data) if data is not None else None
+        self.price_events += 1
+
+        # Only products this terminal holds are updated, the rest are fetched when scanned
+        if product is None:
+            self.cache.invalidate(barcode)
+        elif barcode in self.cache:
+            self.cache.put(barcode, product, etag=etag)
+        if self.catalog is not None:
+            try:
+                self.catalog.apply_change(barcode, data)
+            except Exception as e:
+                print(f"Error updating catalog: {e}")
+
+        if self.on_price_change is not None:
+            self.on_price_change(barcode, product)
+
+    async def get_products(
+        self,
+        codes: list[str],
+        chunk_size: int = config.BATCH_CHUNK_SIZE,
+        concurrency: int = config.BATCH_CONCURRENCY,
+    ) -> list[tuple[Optional[ProductInfo], Optional[str]]]:
+        """
+        Look up many barcodes through the batch endpoint
+        Returns: one (product, error) pair per code, in input order
+        """
+        results: dict[str, tuple[Optional[ProductInfo], Optional[str]]] = {}
+
+        # Cached codes never go to the network, duplicates are requested once
+        pending = []
+        for code in dict.fromkeys(codes):
+            cached = self.cache.get(code)
+            if cached is not None:
+                results[code] = (cached, None)
+            else:
+                pending.append(code)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_chunk(chunk: list[str]):
+            async with semaphore:
+                try:
+                    results.update(await self._fetch_products(chunk))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = f"Error: {str(e)}"
+                    for code in chunk:
+                        product = None if _server_answered(e) else self.catalog_lookup(code)
+                        results[code] = (product, None) if product is not None else (None, error)
+
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+
+        return [results[code] for code in codes]
+
+    async def resync_pending(
+        self, limit: int = config.RESYNC_BATCH_SIZE
+    ) -> list[tuple[str, str, Optional[ProductInfo], Optional[str]]]:
+        """
+        Look up due queued scans in one batch request
+        Returns: (barcode, queued_at, product, error) for each scan the API answered
+        """
+        if self.scan_queue is None:
+            return []
+        due = await asyncio.to_thread(self.scan_queue.due, limit)
+        if not due:
+            return []
+
+        codes = [code for code, _ in due]
+        try:
+            results = await self._fetch_products(codes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Still unreachable, or rejected as a whole: try these again later
+            await asyncio.to_thread(self.scan_queue.retry_later, codes, str(e))
+            await self.show_debug(f"Resync of {len(codes)} pending scans failed: {e}")
+            return []
+
+        await asyncio.to_thread(self.scan_queue.resolve, codes)
+        return [(code, queued_at, *results[code]) for code, queued_at in due]
+
+    async def _fetch_products(self, codes: list[str]) -> dict[str, tuple[Optional[ProductInfo], Optional[str]]]:
+        url = f"{self.base_url}/products"
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+
+        response = await self._request(url, headers, params={"codes": ",".join(codes)})
+
+        results = {}
+        for code, product, etag, error in decode_products(response.content):
+            if product is not None:
+                self.cache.put(code, product, etag=etag)
+                results[code] = (product, None)
+            else:
+                results[code] = (None, f"Error: {error}")
+
+        # Codes the server left out of the answer
+        for code in codes:
+            results.setdefault(code, (None, "Error: Not found"))
+        return results
+
+    async def _fetch_product(self, scan_code: str, deadline: Optional[float] = None) -> ProductInfo:
+        url = f"{self.base_url}/products/{scan_code}"
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+
+        # Revalidate a cached copy instead of downloading it again
+        conditional = dict(headers)
+        etag, last_modified = self.cache.validators(scan_code)
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+
+        response = await self._hedged(lambda: self._request(url, conditional, deadline=deadline))
+        if response.status_code == 304:
+            product = self.cache.touch(scan_code)
+            if product is not None:
+                self.not_modified += 1
+                return product
+            # Evicted while the request was in flight
+            response = await self._hedged(lambda: self._request(url, headers, deadline=deadline))
+
+        with self.metrics.measure("decode"):
+            product = decode_product(response.content)
+        self.cache.put(
+            scan_code,
+            product,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        return product
+
+    async def revalidate_cache(self, concurrency: int = config.BATCH_CONCURRENCY) -> dict:
+        """
+        Refresh every cached product with conditional requests; unchanged ones cost a 304
+        Returns: counts of "not_modified", "updated" and "failed" products
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"not_modified": 0, "updated": 0, "failed": 0}
+
+        async def revalidate(code: str):
+            async with semaphore:
+                cached = self.cache.peek(code)
+                try:
+                    product = await self._fetch_product(code)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    counts["failed"] += 1
+                    await self.show_debug(f"Revalidating {code} failed: {e}")
+                    return
+                # A 304 hands back the very object that was cached
+                unchanged = cached is not None and product is cached[0]
+                counts["not_modified" if unchanged else "updated"] += 1
+
+        await asyncio.gather(*(revalidate(code) for code in self.cache.keys()))
+        return counts
+
+    async def _request(
+        self,
+        url: str,
+        headers: dict,
+        params: Optional[dict] = None,
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        GET with jittered retries and the circuit breaker; raises for error statuses.
+        No retry starts after `deadline` (event loop time).
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retry_attempts + 1):
+            if not self.breaker.allow():
+                self.fast_failures += 1
+                raise CircuitOpenError("API unavailable, retrying later")
+            try:
+                response = await self._get(url, headers, params)
+                # 304 answers a conditional request, the cached copy is still current
+                if response.status_code != 304:
+                    response.raise_for_status()
+            except asyncio.CancelledError:
+                # An abandoned probe must not keep the circuit half open
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                if _backend_failed(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                delay = _backoff(attempt)
+                last_attempt = attempt == self.retry_attempts
+                if last_attempt or not _retryable(e) or (deadline is not None and loop.time() + delay >= deadline):
+                    raise
+                self.retries += 1
+                await self.show_debug(f"Retrying {url} in {delay * 1000:.0f} ms after: {e!r}")
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return response
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent lookups, None until there are enough samples"""
+        if not self.hedge_enabled or self.metrics.count("api") < config.HEDGE_MIN_SAMPLES:
+            return None
+        return self.metrics.p95("api")
+
+    async def _hedged(self, make_request):
+        """
+        Run a request; if it has not answered within the p95, send a second one
+        and take whichever succeeds first. The loser is cancelled.
+        """
+        first = asyncio.ensure_future(make_request())
+        delay = self.hedge_delay()
+        pending = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.hedged_requests += 1
+                    pending.add(asyncio.ensure_future(make_request()))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def catalog_lookup(self, scan_code: str) -> Optional[ProductInfo]:
+        if self.catalog is None:
+            return None
+        try:
+            with self.metrics.measure("catalog"):
+                return self.catalog.lookup(scan_code)
+        except Exception as e:
+            print(f"Error reading catalog: {e}")
+            return None
@@ -1,50 +1,66 @@
 import flet as ft
 import json
+import os
+import asyncio
+import random
+import time
 from datetime import datetime
-from .handlers import handle_scan
-from .utils import create_history_item
-from .api_client import APIClient
+from decimal import Decimal
+from typing import Optional, TYPE_CHECKING
+from .handlers import handle_scan, parse_scan
+from .barcode import Barcode
+from .utils import create_history_item, StartupTimer
+from .catalog import ProductCatalog
+from .scanner import ScanAssembler
+from .history import HistoryStore
+from .scan_queue import ScanQueue
+from .metrics import LatencyMetrics
+from .settings import Settings, SettingsStore
 from .models import ProductInfo
 from .languages import TRANSLATIONS
+from . import config
 
+if TYPE_CHECKING:
+    from .api_client import APIClient
+    from .audit import AuditResult
 
-# Global settings with default values
-APP_SETTINGS = {
-    "api_url": "http://127.0.0.1:8000",
-    "api_key": "",
-    "language": "ukr",
-    "scan_timeout": 1.0,
-    "min_scan_length": 4,
-    "max_scan_length": 14
-}
 
-# Load saved settings at app start
-def load_saved_settings(page: ft.Page):
-    global APP_SETTINGS
-    try:
-        saved = page.client_storage.get("app_settings")
-        if saved:
-            APP_SETTINGS.update(json.loads(saved))
-            print(f"Loaded settings: {APP_SETTINGS}")
-    except Exception as e:
-        print(f"Error loading settings: {e}")
+def price_changed(old: ProductInfo, new: ProductInfo) -> bool:
+    return (old.price, old.discount_price) != (new.price, new.discount_price)
 
 class HistoryView(ft.View):
-    def __init__(self, page: ft.Page, language: str):
+    def __init__(self, page: ft.Page, language: str, history_store: HistoryStore):
         super().__init__()
         self.page = page
         self.language = language
+        self.history_store = history_store
+        
+        # Entries are loaded page by page while scrolling, keeping at most
+        # HISTORY_MAX_LIVE_ITEMS controls alive
+        self.query = ""
+        self.has_older = False
+        self.has_newer = False
+        self.list_view = ft.ListView(
+            spacing=10,
+            expand=True,
+            on_scroll=self.on_list_scroll,
+            on_scroll_interval=100,
+        )
         
         # Create a container for history items
         self.history_container = ft.Container(
-            content=ft.ListView(
-                spacing=10,
-                expand=True,
-            ),
+            content=self.list_view,
             padding=10,
             expand=True
         )
         
+        self.search_field = ft.TextField(
+            label=TRANSLATIONS[self.language]["search"],
+            prefix_icon=ft.icons.SEARCH,
+            dense=True,
+            on_change=self.on_search,
+        )
+        
         self.controls = [
             ft.Stack(
                 [
@@ -63,6 +79,10 @@ class HistoryView(ft.View):
                                     bgcolor=ft.colors.SURFACE_VARIANT,
                                     padding=10,
                                 ),
+                                ft.Container(
+                                    content=self.search_field,
+                                    padding=ft.padding.only(left=10, right=10, top=10),
+                                ),
                                 self.history_container
                             ],
                             spacing=0,
@@ -77,36 +97,111 @@ class HistoryView(ft.View):
         
         self.load_history()
     
+    def build_item(self, item: dict) -> ft.Control:
+        return create_history_item(
+            item["barcode"], 
+            ProductInfo.from_dict(item["product"]),
+            TRANSLATIONS[self.language],
+            datetime.fromisoformat(item["timestamp"]),
+            entry_id=item.get("id"),
+        )
+    
+    def entry_ids(self) -> list[int]:
+        return [control.data for control in self.list_view.controls if control.data is not None]
+    
     def load_history(self):
+        """Render the first page only, the rest loads as the list scrolls"""
         try:
-            saved_history = self.page.client_storage.get("scan_history")
-            if saved_history:
-                history = json.loads(saved_history)
-                for item in history:
-                    product = ProductInfo(**item["product"])
-                    history_item = create_history_item(
-                        item["barcode"], 
-                        product,
-                        TRANSLATIONS[self.language],
-                        datetime.fromisoformat(item["timestamp"])
-                    )
-                    self.history_container.content.controls.append(history_item)
+            items = self.history_store.page(config.HISTORY_PAGE_SIZE, query=self.query)
+            self.list_view.controls = [self.build_item(item) for item in items]
+            self.has_older = len(items) == config.HISTORY_PAGE_SIZE
+            self.has_newer = False
         except Exception as e:
             print(f"Error loading history: {e}")
     
+    async def on_list_scroll(self, e: ft.OnScrollEvent):
+        """
+        Async so Flet runs it on the event loop: scroll events that arrive while
+        a page loads wait their turn instead of appending the same page twice
+        """
+        try:
+            margin = e.viewport_dimension or 0
+            if self.has_older and e.pixels >= e.max_scroll_extent - margin:
+                self.load_older()
+            elif self.has_newer and e.pixels <= e.min_scroll_extent + margin:
+                self.load_newer()
+        except Exception as e:
+            print(f"Error loading history page: {e}")
+    
+    def load_older(self):
+        ids = self.entry_ids()
+        if not ids:
+            return
+        items = self.history_store.page(config.HISTORY_PAGE_SIZE, before_id=min(ids), query=self.query)
+        self.has_older = len(items) == config.HISTORY_PAGE_SIZE
+        if not items:
+            return
+        
+        controls = self.list_view.controls
+        anchor = controls[-1]
+        controls.extend(self.build_item(item) for item in items)
+        
+        # Drop entries scrolled far above, they are reloaded when scrolling back up
+        excess = len(controls) - config.HISTORY_MAX_LIVE_ITEMS
+        if excess > 0:
+            del controls[:excess]
+            self.has_newer = True
+        self.list_view.update()
+        if excess > 0 and anchor.key:
+            self.list_view.scroll_to(key=anchor.key, duration=0)
+    
+    def load_newer(self):
+        ids = self.entry_ids()
+        if not ids:
+            return
+        items = self.history_store.page(config.HISTORY_PAGE_SIZE, after_id=max(ids), query=self.query)
+        self.has_newer = len(items) == config.HISTORY_PAGE_SIZE
+        if not items:
+            return
+        
+        controls = self.list_view.controls
+        anchor = controls[0]
+        controls[0:0] = [self.build_item(item) for item in items]
+        
+        excess = len(controls) - config.HISTORY_MAX_LIVE_ITEMS
+        if excess > 0:
+            del controls[-excess:]
+            self.has_older = True
+        self.list_view.update()
+        if anchor.key:
+            self.list_view.scroll_to(key=anchor.key, duration=0)
+    
+    async def on_search(self, e):
+        self.query = self.search_field.value or ""
+        self.load_history()
+        self.list_view.update()
+    
+    def add_entry(self, item: dict):
+        """Show a new scan at the top if the newest entries are loaded"""
+        if self.has_newer or self.query:
+            return
+        controls = self.list_view.controls
+        controls.insert(0, self.build_item(item))
+        if len(controls) > config.HISTORY_MAX_LIVE_ITEMS:
+            del controls[config.HISTORY_MAX_LIVE_ITEMS:]
+            self.has_older = True
+        # A cached view that is not on screen is sent in full when shown again
+        if self in self.page.views:
+            self.list_view.update()
+    
     async def clear_history(self, _):
         try:
-            await self.page.client_storage.set_async("scan_history", "[]")
-            
-            current_storage = await self.page.client_storage.get_async("scan_history")
+            self.history_store.clear()
             
-            self.history_container.content.controls.clear()
-            self.history_container.content.update()
-            
-            for view in self.page.views:
-                if isinstance(view, MainView):
-                    view.history = []
-                    break
+            self.list_view.controls.clear()
+            self.has_older = False
+            self.has_newer = False
+            self.list_view.update()
                     
             self.page.update()
         except Exception as e:
@@ -117,93 +212,330 @@ class HistoryView(ft.View):
         self.page.go('/')
 
 class ProductInfoCard(ft.Card):
+    """Builds its controls once; each scan only changes values and visibility"""
+    
     def __init__(self, language: str = "ukr"):
         super().__init__()
         self.t = TRANSLATIONS[language]
-        self.content = ft.Container(
-            content=ft.Column(
+        
+        self.no_product_text = ft.Text(self.t["no_product"], size=16)
+        
+        # Shown while a known price is being revalidated
+        self.stale_text = ft.Text(
+            self.t["possibly_stale"],
+            size=12,
+            italic=True,
+            color=ft.colors.GREY_600,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        
+        # Shown while a scan waits in the offline queue
+        self.pending_text = ft.Text(
+            size=14,
+            color=ft.colors.ORANGE_700,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        
+        self.name_text = ft.Text(
+            size=24,
+            weight=ft.FontWeight.BOLD,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        
+        self.measurement_text = ft.Text(size=14)
+        self.measurement_label = ft.Text(self.t["measurement"], size=14, color=ft.colors.GREY_700)
+        self.measurement_row = ft.Row(
+            [
+                self.measurement_label,
+                self.measurement_text,
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+            visible=False,
+        )
+        
+        self.price_text = ft.Text(
+            size=36,
+            weight=ft.FontWeight.BOLD,
+            color=ft.colors.BLACK,
+        )
+        self.price_label = ft.Text(self.t["price"], size=20)
+        self.price_container = ft.Container(
+            content=ft.Row(
                 [
-                    ft.Text(self.t["no_product"], size=16),
+                    self.price_label,
+                    self.price_text,
                 ],
-                spacing=10,
+                alignment=ft.MainAxisAlignment.CENTER,
             ),
-            padding=15,
+            padding=ft.padding.symmetric(vertical=10),
+            visible=False,
         )
         
-    def update_info(self, product: ProductInfo):
-        self.content.content.controls = [
-            ft.Text(
-                product.name,
-                size=24,
-                weight=ft.FontWeight.BOLD,
-                text_align=ft.TextAlign.CENTER,
-            ),
-            
-            ft.Row(
+        self.discount_text = ft.Text(
+            size=36,
+            weight=ft.FontWeight.BOLD,
+            color=ft.colors.RED,
+        )
+        self.special_offer_text = ft.Text(
+            self.t["special_offer"],
+            size=16,
+            color=ft.colors.RED,
+            weight=ft.FontWeight.BOLD,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self.discount_container = ft.Container(
+            content=ft.Column(
                 [
-                    ft.Text(self.t["measurement"], size=14, color=ft.colors.GREY_700),
-                    ft.Text(product.measurement, size=14),
+                    self.special_offer_text,
+                    ft.Row(
+                        [self.discount_text],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
                 ],
+                spacing=5,
                 alignment=ft.MainAxisAlignment.CENTER,
             ),
-            
-            ft.Container(
-                content=ft.Row(
-                    [
-                        ft.Text(self.t["price"], size=20),
-                        ft.Text(
-                            f"{product.price:.2f}",
-                            size=36,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.colors.BLACK,
-                        ),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                ),
-                padding=ft.padding.symmetric(vertical=10),
+            padding=ft.padding.only(top=10),
+            visible=False,
+        )
+        
+        # Weight or price read from a variable-measure label
+        self.measure: Optional[Barcode] = None
+        # What the card shows, kept to relabel it when the language changes
+        self.product: Optional[ProductInfo] = None
+        self.pending_code: Optional[str] = None
+        self.measure_text = ft.Text(
+            size=16,
+            weight=ft.FontWeight.BOLD,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        
+        self.catalog_text = ft.Text(
+            size=12,
+            color=ft.colors.ORANGE_700,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        
+        self.content = ft.Container(
+            content=ft.Column(
+                [
+                    self.no_product_text,
+                    self.stale_text,
+                    self.pending_text,
+                    self.name_text,
+                    self.measurement_row,
+                    self.price_container,
+                    self.discount_container,
+                    self.measure_text,
+                    self.catalog_text,
+                ],
+                spacing=10,
             ),
-        ]
+            padding=15,
+        )
+        
+    def set_language(self, language: str):
+        """Relabel in place, the caller sends the changes"""
+        self.t = TRANSLATIONS[language]
+        self.no_product_text.value = self.t["no_product"]
+        self.stale_text.value = self.t["possibly_stale"]
+        self.measurement_label.value = self.t["measurement"]
+        self.price_label.value = self.t["price"]
+        self.special_offer_text.value = self.t["special_offer"]
+        if self.pending_code is not None:
+            self.pending_text.value = f"{self.pending_code}\n{self.t['pending']}"
+        if self.product is not None:
+            self.measure_text.value = self.measure_line(self.product)
+            self.catalog_text.value = self.catalog_line(self.product)
+    
+    def set_stale(self, stale: bool):
+        self.stale_text.visible = stale
+        self.stale_text.update()
+        
+    def show_pending(self, barcode: str):
+        """No price yet, the scan is queued until the API is reachable"""
+        self.product = None
+        self.pending_code = barcode
+        self.no_product_text.visible = False
+        self.stale_text.visible = False
+        self.pending_text.value = f"{barcode}\n{self.t['pending']}"
+        self.pending_text.visible = True
+        for control in (self.name_text, self.measurement_row, self.price_container,
+                        self.discount_container, self.measure_text, self.catalog_text):
+            control.visible = False
+        self.update()
+    
+    def update_info(self, product: ProductInfo, stale: bool = False):
+        self.product = product
+        self.pending_code = None
+        self.no_product_text.visible = False
+        self.pending_text.visible = False
+        self.stale_text.visible = stale
+        
+        self.name_text.value = product.name
+        self.name_text.visible = True
+        
+        self.measurement_text.value = product.measurement
+        self.measurement_row.visible = True
+        
+        self.price_text.value = f"{product.price:.2f}"
+        self.price_container.visible = True
         
         if product.discount_price:
-            self.content.content.controls.append(
-                ft.Container(
-                    content=ft.Column(
-                        [
-                            ft.Text(
-                                self.t["special_offer"],
-                                size=16,
-                                color=ft.colors.RED,
-                                weight=ft.FontWeight.BOLD,
-                                text_align=ft.TextAlign.CENTER,
-                            ),
-                            ft.Row(
-                                [
-                                    ft.Text(
-                                        f"{product.discount_price:.2f}",
-                                        size=36,
-                                        weight=ft.FontWeight.BOLD,
-                                        color=ft.colors.RED,
-                                    ),
-                                ],
-                                alignment=ft.MainAxisAlignment.CENTER,
-                            ),
-                        ],
-                        spacing=5,
-                        alignment=ft.MainAxisAlignment.CENTER,
-                    ),
-                    padding=ft.padding.only(top=10),
-                )
-            )
+            self.discount_text.value = f"{product.discount_price:.2f}"
+        self.discount_container.visible = bool(product.discount_price)
+        
+        measure = self.measure_line(product)
+        if measure:
+            self.measure_text.value = measure
+        self.measure_text.visible = bool(measure)
+        
+        if product.catalog_as_of:
+            self.catalog_text.value = self.catalog_line(product)
+        self.catalog_text.visible = bool(product.catalog_as_of)
+        
+        # Only changed properties are sent to the client
         self.update()
+    
+    def catalog_line(self, product: ProductInfo) -> Optional[str]:
+        if product.catalog_as_of is None:
+            return None
+        return f"{self.t['catalog_as_of']}: {product.catalog_as_of.strftime('%Y-%m-%d %H:%M')}"
+    
+    def measure_line(self, product: ProductInfo) -> Optional[str]:
+        """Weight and amount due, or the price printed on a variable-measure label"""
+        measure = self.measure
+        if measure is None or measure.variable_measure is None:
+            return None
+        if measure.variable_measure == "weight":
+            kg = Decimal(measure.measure_value) / 1000
+            unit_price = product.discount_price or product.price
+            total = (unit_price * kg).quantize(Decimal("0.01"))
+            return f"{self.t['weight']}: {kg:.3f} · {self.t['total']}: {total:.2f}"
+        return f"{self.t['label_price']}: {Decimal(measure.measure_value) / 100:.2f}"
 
 class MainView(ft.View):
-    def __init__(self, page: ft.Page, language: str = "en"):
+    """
+    Built in two stages for a fast cold start: the constructor renders only the
+    title and a focused scan field, hydrate() adds the rest once storage and the
+    HTTP client are ready. Scans submitted before that wait for hydration.
+    """
+    
+    def __init__(
+        self,
+        page: ft.Page,
+        language: str = "en",
+        settings_store: SettingsStore = None,
+    ):
         super().__init__(route="/")
         
         # Set instance variables
         self.page = page
         self.language = language
+        self.settings_store = settings_store if settings_store is not None else SettingsStore()
+        self.t = TRANSLATIONS[language]
+        self.ready = asyncio.Event()
+        self.lookup_task: Optional[asyncio.Task] = None
+        # Code the product card is showing, so resynced results can replace a pending card
+        self.current_code: Optional[str] = None
+        # Per-stage scan timings, shown on the diagnostics screen
+        self.metrics = LatencyMetrics()
+        
+        # Scanner keystrokes that arrive while the scan field is not focused
+        self.scan_assembler = ScanAssembler()
+        self.apply_scan_settings()
+        
+        self.title_text = ft.Text(self.t["app_title"], size=24, weight=ft.FontWeight.BOLD)
+        self.scan_field = ft.TextField(
+            label=self.t["scan_here"],
+            width=None,
+            expand=True,
+            autofocus=True,
+            on_submit=self.on_scan,
+            on_focus=self.scan_assembler.on_field_focus,
+            on_blur=self.scan_assembler.on_field_blur,
+            multiline=False,
+            text_size=18,
+            keyboard_type=ft.KeyboardType.NONE,
+        )
+        self.audit_button = ft.IconButton(
+            icon=ft.icons.FACT_CHECK,
+            tooltip=self.t["audit"],
+            on_click=lambda _: self.page.go("/audit"),
+        )
+        self.submit_button = ft.ElevatedButton(
+            self.t["submit"],
+            on_click=self.on_scan,
+            width=100,
+            height=50,
+            style=ft.ButtonStyle(
+                padding=ft.padding.all(15),
+            ),
+        )
+        
+        # Product card, status lines and buttons are added by hydrate()
+        self.body = ft.Column([
+            ft.Row([
+                self.scan_field,
+                ft.IconButton(
+                    icon=ft.icons.KEYBOARD,
+                    on_click=self.toggle_keyboard,
+                    tooltip="Toggle keyboard",
+                ),
+                self.audit_button,
+                self.submit_button,
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            spacing=10),
+        ], spacing=10)
+        
+        # Set up controls
+        self.controls = [
+            ft.Stack([
+                ft.Column([
+                    self.title_text,
+                    self.body,
+                ], spacing=10, expand=True),
+            ], expand=True)
+        ]
+        
+        # Add keyboard listener to the page
+        self.page.on_keyboard_event = self.handle_keyboard_event
+    
+    def set_language(self, language: str):
+        """Relabel in place: once the saved language is known, or after it changed in settings"""
+        self.language = language
         self.t = TRANSLATIONS[language]
+        self.title_text.value = self.t["app_title"]
+        self.scan_field.label = self.t["scan_here"]
+        self.submit_button.text = self.t["submit"]
+        self.audit_button.tooltip = self.t["audit"]
+        if not self.ready.is_set():
+            return
+        
+        self.diagnostics_button.tooltip = self.t["diagnostics"]
+        self.history_button.text = self.t["view_history"]
+        self.settings_button.text = self.t["settings"]
+        self.settings_dialog.title.value = self.t["settings_confirm"]
+        self.settings_dialog.content.value = self.t["settings_confirm"]
+        self.settings_dialog.actions[0].text = self.t["yes"]
+        self.settings_dialog.actions[1].text = self.t["no"]
+        self.product_card.set_language(language)
+    
+    def hydrate(
+        self,
+        catalog: ProductCatalog = None,
+        history_store: HistoryStore = None,
+        scan_queue: ScanQueue = None,
+    ):
+        self.catalog = catalog
+        self.history_store = history_store if history_store is not None else HistoryStore()
+        self.scan_queue = scan_queue
         
         # Create status_text with better visibility
         self.status_text = ft.Text(
@@ -217,94 +549,61 @@ class MainView(ft.View):
             text_align=ft.TextAlign.LEFT,
         )
         
-        # Use global settings directly
-        self.api_client = APIClient(
-            APP_SETTINGS["api_url"],
-            APP_SETTINGS["api_key"],
-            status_text=self.status_text
+        # Debug status line with cache and connection stats
+        self.debug_text = ft.Text(
+            size=10,
+            color=ft.colors.GREY_600,
+            visible=config.DEBUG,
+            expand=True,
+        )
+        self.diagnostics_button = ft.IconButton(
+            icon=ft.icons.SPEED,
+            icon_size=16,
+            tooltip=self.t["diagnostics"],
+            on_click=lambda _: self.page.go("/diagnostics"),
+            visible=config.DEBUG,
         )
         
-        self.product_card = ProductInfoCard(language)
+        self.api_client = self.create_api_client(self.settings_store.settings)
+        self.settings_store.subscribe(self.on_settings_change)
         
-        # Load existing history from storage
-        try:
-            saved_history = page.client_storage.get("scan_history")
-            self.history = json.loads(saved_history) if saved_history else []
-        except Exception as e:
-            print(f"Error loading history: {e}")
-            self.history = []
+        self.product_card = ProductInfoCard(self.language)
         
-        # Set up controls
-        self.controls = [
-            ft.Stack([
-                ft.Column([
-                    ft.Text(self.t["app_title"], size=24, weight=ft.FontWeight.BOLD),
-                    ft.Column([
-                        ft.Row([
-                            ft.TextField(
-                                label=self.t["scan_here"],
-                                width=None,
-                                expand=True,
-                                autofocus=True,
-                                on_submit=self.on_scan,
-                                multiline=False,
-                                text_size=18,
-                                keyboard_type=ft.KeyboardType.NONE,
-                            ),
-                            ft.IconButton(
-                                icon=ft.icons.KEYBOARD,
-                                on_click=self.toggle_keyboard,
-                                tooltip="Toggle keyboard",
-                            ),
-                            ft.ElevatedButton(
-                                self.t["submit"],
-                                on_click=self.on_scan,
-                                width=100,
-                                height=50,
-                                style=ft.ButtonStyle(
-                                    padding=ft.padding.all(15),
-                                ),
-                            ),
-                        ],
-                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                        spacing=10),
-                        ft.Text(
-                            size=16,
-                            color=ft.colors.GREY_700
-                        ),
-                        self.status_text,
-                        self.product_card,
-                    ], spacing=10),
-                ], spacing=10, expand=True),
-                ft.Container(
-                    content=ft.Row([
-                        ft.ElevatedButton(
-                            self.t["view_history"],
-                            on_click=lambda _: page.go("/history"),
-                            width=200,
-                            height=50,
-                        ),
-                        ft.ElevatedButton(
-                            self.t["settings"],
-                            on_click=self.show_settings_dialog,
-                            width=200,
-                            height=50,
-                        ),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    spacing=10),
-                    alignment=ft.alignment.center,
-                    bottom=20,
-                    left=0,
-                    right=0,
-                ),
-            ], expand=True)
+        self.body.controls += [
+            ft.Text(
+                size=16,
+                color=ft.colors.GREY_700
+            ),
+            self.status_text,
+            ft.Row([self.debug_text, self.diagnostics_button], spacing=0),
+            self.product_card,
         ]
-        
-        self.scan_field = self.controls[0].controls[0].controls[1].controls[0].controls[0]
-        
-        # Add keyboard listener to the page
-        self.page.on_keyboard_event = self.handle_keyboard_event
+        self.history_button = ft.ElevatedButton(
+            self.t["view_history"],
+            on_click=lambda _: self.page.go("/history"),
+            width=200,
+            height=50,
+        )
+        self.settings_button = ft.ElevatedButton(
+            self.t["settings"],
+            on_click=self.show_settings_dialog,
+            width=200,
+            height=50,
+        )
+        self.controls[0].controls.append(
+            ft.Container(
+                content=ft.Row([
+                    self.history_button,
+                    self.settings_button,
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+                spacing=10),
+                alignment=ft.alignment.center,
+                bottom=20,
+                left=0,
+                right=0,
+            )
+        )
         
         # Add dialog definition
         self.settings_dialog = ft.AlertDialog(
@@ -317,80 +616,232 @@ class MainView(ft.View):
             ],
             actions_alignment=ft.MainAxisAlignment.END,
         )
+        
+        self.ready.set()
     
-    def handle_keyboard_event(self, e: ft.KeyboardEvent):
-        """Handle keyboard events globally"""
+    async def handle_keyboard_event(self, e: ft.KeyboardEvent):
+        """
+        Handle keyboard events globally. Async so Flet runs it on the event loop:
+        keys reach the assembler one at a time and in the order they arrived,
+        instead of racing on executor threads.
+        """
         try:
             # Check if page and route exist before accessing
-            if hasattr(self, 'page') and self.page and self.page.route == "/":
+            if not (hasattr(self, 'page') and self.page and self.page.route == "/"):
+                return
+            
+            # Assemble the burst without any per-key page updates
+            scan_code = self.scan_assembler.feed_page_key(e.key)
+            if scan_code:
+                self.metrics.record("input", self.scan_assembler.last_duration)
+                self.page.run_task(self.submit_scan, scan_code)
                 self.scan_field.focus()
-                self.page.update()
         except Exception as e:
             print(f"Error handling keyboard event: {e}")
     
+    def create_api_client(self, settings: Settings) -> "APIClient":
+        # Imported on first use so httpx stays off the cold-start path
+        from .api_client import APIClient
+        client = APIClient(
+            settings.api_url,
+            settings.api_key,
+            status_text=self.status_text,
+            catalog=self.catalog,
+            metrics=self.metrics,
+            history_store=self.history_store,
+            scan_queue=self.scan_queue,
+        )
+        # Pushed price changes keep the cache and the product card current
+        client.on_price_change = self.on_price_change
+        if config.PRICE_STREAM_ENABLED:
+            client.start_price_stream()
+        return client
+    
+    def on_price_change(self, scan_code: str, product: Optional[ProductInfo]):
+        if product is None or scan_code != self.current_code:
+            return
+        self.product_card.update_info(product)
+        if config.DEBUG:
+            self.debug_text.value = self.api_client.stats_line()
+        self.page.update()
+    
+    def apply_scan_settings(self):
+        self.scan_assembler.apply_settings(self.settings_store.settings)
+    
+    def on_settings_change(self, old: Settings, new: Settings):
+        self.apply_scan_settings()
+        
+        # Rebuild the client only when the connection settings changed
+        if (old.api_url, old.api_key) != (new.api_url, new.api_key):
+            old_client = self.api_client
+            self.api_client = self.create_api_client(new)
+            self.page.run_task(old_client.aclose)
+    
     async def on_scan(self, e):
-        if not self.scan_field.value:
+        scan_code = self.scan_field.value
+        if not scan_code:
             return
-            
-        # Get product info from API
-        product, error = await self.api_client.get_product_info(self.scan_field.value)
         
+        # Free the field for the next scan right away
+        self.reset_scan_field()
+        await self.submit_scan(scan_code)
+    
+    async def submit_scan(self, scan_code: str):
+        await self.ready.wait()
+        started = time.perf_counter()
+        
+        # Validate the check digit before any network call
+        settings = self.settings_store.settings
+        with self.metrics.measure("validate"):
+            barcode, error = parse_scan(scan_code, settings.min_scan_length, settings.max_scan_length)
         if error:
+            # No lookup for a misread, the previous scan keeps pricing
+            self.status_text.value = error
+            self.status_text.color = "red"
+            self.page.update()
+            return
+        
+        # A newer scan supersedes the lookup still in flight, only the newest result renders
+        if self.lookup_task is not None and not self.lookup_task.done():
+            self.lookup_task.cancel()
+        lookup_task = self.lookup_task = asyncio.ensure_future(self.lookup(barcode.code, barcode))
+        await asyncio.wait({lookup_task})
+        
+        # Superseded or failed scans never put a price on screen
+        if not lookup_task.cancelled() and lookup_task.exception() is None:
+            self.metrics.record("scan", time.perf_counter() - started)
+    
+    async def lookup(self, scan_code: str, barcode: Optional[Barcode] = None):
+        self.current_code = scan_code
+        self.product_card.measure = barcode
+        stale = self.find_stale_product(scan_code)
+        if stale is not None:
+            # Show the known price at once, then revalidate it against the API
+            with self.metrics.measure("render"):
+                self.product_card.update_info(stale, stale=True)
+            product, error = await self.api_client.get_product_info(scan_code, use_cache=False)
+            if not error:
+                if price_changed(stale, product):
+                    self.product_card.update_info(product)
+                else:
+                    self.product_card.set_stale(False)
+        else:
+            # Get product info from API
+            product, error = await self.api_client.get_product_info(scan_code)
+            if not error:
+                with self.metrics.measure("render"):
+                    self.product_card.update_info(product)
+        
+        pending = await self.pending_count(scan_code) if error else 0
+        if pending:
+            # Queued for resync; a stale price, if shown, stays on the card meanwhile
+            if stale is None:
+                self.product_card.show_pending(scan_code)
+            self.status_text.value = f"{self.t['scan_pending']} ({pending})"
+            self.status_text.color = "orange"
+        elif error:
             self.status_text.value = error
             self.status_text.color = "red"
         else:
-            self.product_card.update_info(product)
-            
-            # Create new history item
-            new_item = {
-                "barcode": self.scan_field.value,
-                "product": {
-                    "name": product.name,
-                    "measurement": product.measurement,
-                    "price": product.price,
-                    "discount_price": product.discount_price
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+            with self.metrics.measure("history"):
+                self.save_history(scan_code, product)
+        
+        if config.DEBUG:
+            self.debug_text.value = self.api_client.stats_line()
             
-            # Save to storage
+        self.page.update()
+        self.scan_field.focus()
+    
+    async def pending_count(self, scan_code: str) -> int:
+        """Length of the offline queue if `scan_code` waits in it, else 0; read off the event loop"""
+        if self.scan_queue is None:
+            return 0
+        
+        def count() -> int:
+            return len(self.scan_queue) if scan_code in self.scan_queue else 0
+        try:
+            return await asyncio.to_thread(count)
+        except Exception as e:
+            print(f"Error reading scan queue: {e}")
+            return 0
+    
+    async def resync_loop(self):
+        """Look up queued scans in small batches, spaced out so a fleet does not stampede the API"""
+        await self.ready.wait()
+        while True:
+            await asyncio.sleep(config.RESYNC_INTERVAL + random.uniform(0, config.RESYNC_JITTER))
             try:
-                self.history.insert(0, new_item)
-                self.history = self.history[:10]  # Keep only last 10
-                
-                await self.page.client_storage.set_async("scan_history", json.dumps(self.history))
-                
-                # Create and add history item to view
-                history_item = create_history_item(
-                    new_item["barcode"], 
-                    product,
-                    TRANSLATIONS[self.language],
-                    datetime.fromisoformat(new_item["timestamp"])
-                )
-                
-                # Update history view if it exists
-                for view in self.page.views:
-                    if isinstance(view, HistoryView):
-                        view.history_container.content.controls.insert(0, history_item)
-                        view.history_container.content.controls = view.history_container.content.controls[:10]
-                        view.history_container.content.update() 
-                        view.history_container.update()
-                        view.update()
-                        break
-                
-                self.status_text.value = TRANSLATIONS[self.language]["scan_successful"]
-                self.status_text.color = "green"
-                
+                if self.scan_queue is None or not await asyncio.to_thread(len, self.scan_queue):
+                    continue
+                resolved = await self.api_client.resync_pending()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error saving to storage: {e}")
-                self.status_text.value = TRANSLATIONS[self.language]["error_saving"]
-                self.status_text.color = "red"
-            
+                print(f"Error resyncing pending scans: {e}")
+                continue
+            if resolved:
+                self.apply_resynced(resolved)
+    
+    def apply_resynced(self, resolved: list[tuple[str, str, Optional[ProductInfo], Optional[str]]]):
+        synced = 0
+        for scan_code, queued_at, product, error in resolved:
+            if product is None:
+                print(f"Pending scan {scan_code} resolved with error: {error}")
+                continue
+            synced += 1
+            # Recorded at the time it was scanned
+            self.save_history(scan_code, product, timestamp=queued_at)
+            if scan_code == self.current_code:
+                self.product_card.update_info(product)
+        
+        self.status_text.value = f"{self.t['pending_synced']}: {synced}"
+        self.status_text.color = "green"
+        self.page.update()
+    
+    def find_stale_product(self, scan_code: str) -> Optional[ProductInfo]:
+        """Known but possibly outdated product: expired cache entry or last history record"""
+        cached = self.api_client.cache.peek(scan_code)
+        if cached is not None:
+            product, is_fresh = cached
+            return None if is_fresh else product
+        
+        try:
+            item = self.history_store.latest_for(scan_code)
+        except Exception as e:
+            print(f"Error reading history: {e}")
+            item = None
+        return ProductInfo.from_dict(item["product"]) if item else None
+    
+    def reset_scan_field(self):
         self.scan_field.value = ""
         self.scan_field.keyboard_type = ft.KeyboardType.NONE 
         self.scan_field.update()
-        self.page.update()
-        self.scan_field.focus()
+    
+    def save_history(self, scan_code: str, product: ProductInfo, timestamp: Optional[str] = None):
+        # Create new history item
+        new_item = {
+            "barcode": scan_code,
+            "product": product.to_dict(),
+            "timestamp": timestamp or datetime.now().isoformat()
+        }
+        
+        # Save to storage
+        try:
+            # Queued append, written off the scan path
+            self.history_store.append(new_item)
+            
+            # Keep the cached history view current without rebuilding it
+            history_view = self.page.data["app"].history_view
+            if history_view is not None:
+                history_view.add_entry(new_item)
+            
+            self.status_text.value = TRANSLATIONS[self.language]["scan_successful"]
+            self.status_text.color = "green"
+            
+        except Exception as e:
+            print(f"Error saving to storage: {e}")
+            self.status_text.value = TRANSLATIONS[self.language]["error_saving"]
+            self.status_text.color = "red"
     
     def show_settings_dialog(self, _):
         self.page.dialog = self.settings_dialog
@@ -422,36 +873,38 @@ class MainView(ft.View):
 
 
 class ConfigView(ft.View):
-    def __init__(self, page: ft.Page, language: str):
+    def __init__(self, page: ft.Page, language: str, settings_store: SettingsStore):
         super().__init__()
         self.page = page
         self.language = language
+        self.settings_store = settings_store
+        settings = settings_store.settings
         
-        # Use global settings for initial values
+        # Use current settings for initial values
         self.api_url_field = ft.TextField(
             label=TRANSLATIONS[self.language]["api_url"],
-            value=APP_SETTINGS["api_url"],
+            value=settings.api_url,
             width=None,
             expand=True
         )
         
         self.scan_timeout_field = ft.TextField(
             label=TRANSLATIONS[self.language]["scan_timeout"],
-            value=str(APP_SETTINGS["scan_timeout"]),
+            value=str(settings.scan_timeout),
             width=None,
             expand=True
         )
         
         self.min_length_field = ft.TextField(
             label=TRANSLATIONS[self.language]["min_length"],
-            value=str(APP_SETTINGS["min_scan_length"]),
+            value=str(settings.min_scan_length),
             width=None,
             expand=True
         )
         
         self.max_length_field = ft.TextField(
             label=TRANSLATIONS[self.language]["max_length"],
-            value=str(APP_SETTINGS["max_scan_length"]),
+            value=str(settings.max_scan_length),
             width=None,
             expand=True
         )
@@ -470,7 +923,7 @@ class ConfigView(ft.View):
 
         self.api_key_field = ft.TextField(
             label=TRANSLATIONS[self.language]["api_key"],
-            value=APP_SETTINGS["api_key"],
+            value=settings.api_key,
             width=None,
             expand=True,
             password=True  # Hide the API key
@@ -536,20 +989,18 @@ class ConfigView(ft.View):
         page.update()
         page.go('/')
 
-    def save_settings(self, _):
-        global APP_SETTINGS
+    async def save_settings(self, _):
         try:
-            APP_SETTINGS.update({
-                "api_url": self.api_url_field.value,
-                "api_key": self.api_key_field.value,
-                "scan_timeout": float(self.scan_timeout_field.value),
-                "min_scan_length": int(self.min_length_field.value),
-                "max_scan_length": int(self.max_length_field.value),
-                "language": self.language_dropdown.value
-            })
-            # Save to permanent storage synchronously
-            self.page.client_storage.set("app_settings", json.dumps(APP_SETTINGS))
-            print(f"Settings saved: {APP_SETTINGS}")
+            # Validated before anything is stored; subscribers pick up the changes
+            settings = self.settings_store.update(
+                api_url=self.api_url_field.value,
+                api_key=self.api_key_field.value,
+                scan_timeout=self.scan_timeout_field.value,
+                min_scan_length=self.min_length_field.value,
+                max_scan_length=self.max_length_field.value,
+                language=self.language_dropdown.value,
+            )
+            await self.settings_store.save(self.page, settings)
 
             # Navigate and show success message
             page = self.page
@@ -570,12 +1021,325 @@ class ConfigView(ft.View):
             self.page.snack_bar.open = True
             self.page.update()
 
+class DiagnosticsView(ft.View):
+    """Scan latency percentiles per stage, with export to a file"""
+    
+    def __init__(self, page: ft.Page, language: str, main_view: MainView):
+        super().__init__(route="/diagnostics")
+        self.page = page
+        self.language = language
+        self.main_view = main_view
+        self.t = TRANSLATIONS[language]
+        
+        self.stats_text = ft.Text(size=12, color=ft.colors.GREY_700, selectable=True)
+        self.table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text(self.t["stage"])),
+                ft.DataColumn(ft.Text("n"), numeric=True),
+                ft.DataColumn(ft.Text("p50"), numeric=True),
+                ft.DataColumn(ft.Text("p95"), numeric=True),
+                ft.DataColumn(ft.Text("p99"), numeric=True),
+            ],
+            column_spacing=16,
+        )
+        self.empty_text = ft.Text(self.t["no_samples"], color=ft.colors.GREY_600)
+        
+        self.controls = [
+            ft.Container(
+                content=ft.Row(
+                    [
+                        ft.IconButton(ft.icons.ARROW_BACK, on_click=self.go_back),
+                        ft.Text(self.t["diagnostics"], size=20, weight=ft.FontWeight.BOLD),
+                        ft.Row([
+                            ft.IconButton(ft.icons.REFRESH, tooltip=self.t["refresh"], on_click=self.refresh),
+                            ft.IconButton(ft.icons.SAVE_ALT, tooltip=self.t["export"], on_click=self.export),
+                            ft.IconButton(ft.icons.DELETE_OUTLINE, tooltip=self.t["reset"], on_click=self.reset),
+                        ], spacing=0),
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                ),
+                bgcolor=ft.colors.SURFACE_VARIANT,
+                padding=10,
+            ),
+            ft.Container(
+                content=ft.Column(
+                    [self.stats_text, self.empty_text, self.table],
+                    scroll=ft.ScrollMode.AUTO,
+                    expand=True,
+                ),
+                padding=10,
+                expand=True,
+            ),
+        ]
+        self.load()
+    
+    def load(self):
+        """Fill the table from the current samples (times in milliseconds)"""
+        summary = self.main_view.metrics.summary()
+        self.table.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(stage)),
+                ft.DataCell(ft.Text(str(s["count"]))),
+                ft.DataCell(ft.Text(f"{s['p50']:.1f}")),
+                ft.DataCell(ft.Text(f"{s['p95']:.1f}")),
+                ft.DataCell(ft.Text(f"{s['p99']:.1f}")),
+            ])
+            for stage, s in summary.items()
+        ]
+        self.table.visible = bool(summary)
+        self.empty_text.visible = not summary
+        if self.main_view.ready.is_set():
+            self.stats_text.value = self.main_view.api_client.stats_line()
+    
+    def refresh(self, _=None):
+        self.load()
+        self.update()
+    
+    def export(self, _):
+        extra = self.main_view.api_client.stats() if self.main_view.ready.is_set() else None
+        try:
+            path = self.main_view.metrics.export(extra=extra)
+            message = f"{self.t['exported_to']} {path}"
+        except OSError as e:
+            print(f"Error exporting diagnostics: {e}")
+            message = f"Error exporting diagnostics: {e}"
+        self.page.snack_bar = ft.SnackBar(content=ft.Text(message), duration=2000)
+        self.page.snack_bar.open = True
+        self.page.update()
+    
+    def reset(self, _):
+        self.main_view.metrics.clear()
+        self.refresh()
+    
+    def go_back(self, _):
+        self.page.go('/')
+
+
+class AuditView(ft.View):
+    """
+    Stock-check mode: every scan gets a row at once and its lookup runs in the
+    background, up to AUDIT_CONCURRENCY at a time, so the scan field never
+    waits for the API. Rows stay in scan order and fill in as answers arrive.
+    """
+    def __init__(self, page: ft.Page, language: str, main_view: MainView):
+        super().__init__(route="/audit")
+        self.page = page
+        self.language = language
+        self.main_view = main_view
+        self.t = TRANSLATIONS[language]
+        
+        self.results: list["AuditResult"] = []
+        self.lookups: set[asyncio.Task] = set()
+        self.semaphore = asyncio.Semaphore(config.AUDIT_CONCURRENCY)
+        self.session_started: Optional[float] = None
+        self.in_flight = 0
+        
+        # Scanner bursts that arrive while the field is not focused
+        self.scan_assembler = ScanAssembler()
+        
+        self.scan_field = ft.TextField(
+            label=self.t["scan_here"],
+            expand=True,
+            autofocus=True,
+            on_submit=self.on_scan,
+            on_focus=self.scan_assembler.on_field_focus,
+            on_blur=self.scan_assembler.on_field_blur,
+            text_size=18,
+            keyboard_type=ft.KeyboardType.NONE,
+        )
+        self.title_text = ft.Text(self.t["audit"], size=20, weight=ft.FontWeight.BOLD)
+        self.export_button = ft.IconButton(ft.icons.SAVE_ALT, tooltip=self.t["export"], on_click=self.export)
+        self.new_session_button = ft.IconButton(
+            ft.icons.DELETE_OUTLINE, tooltip=self.t["new_session"], on_click=self.new_session
+        )
+        self.summary_text = ft.Text(size=12, color=ft.colors.GREY_700)
+        self.results_list = ft.ListView(expand=True, spacing=2, auto_scroll=True)
+        
+        self.controls = [
+            ft.Container(
+                content=ft.Row(
+                    [
+                        ft.IconButton(ft.icons.ARROW_BACK, on_click=self.go_back),
+                        self.title_text,
+                        ft.Row([self.export_button, self.new_session_button], spacing=0),
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                ),
+                bgcolor=ft.colors.SURFACE_VARIANT,
+                padding=10,
+            ),
+            ft.Container(
+                content=ft.Column(
+                    [ft.Row([self.scan_field]), self.summary_text, self.results_list],
+                    spacing=10,
+                    expand=True,
+                ),
+                padding=10,
+                expand=True,
+            ),
+        ]
+        self.update_summary()
+    
+    def apply_scan_settings(self):
+        self.scan_assembler.apply_settings(self.main_view.settings_store.settings)
+    
+    def set_language(self, language: str):
+        """Relabel in place, the session carries on"""
+        self.language = language
+        self.t = TRANSLATIONS[language]
+        self.scan_field.label = self.t["scan_here"]
+        self.title_text.value = self.t["audit"]
+        self.export_button.tooltip = self.t["export"]
+        self.new_session_button.tooltip = self.t["new_session"]
+        self.update_summary()
+    
+    async def handle_keyboard_event(self, e: ft.KeyboardEvent):
+        """Async like MainView.handle_keyboard_event, keys are assembled in order on the event loop"""
+        try:
+            scan_code = self.scan_assembler.feed_page_key(e.key)
+            if scan_code:
+                self.submit(scan_code)
+        except Exception as e:
+            print(f"Error handling keyboard event: {e}")
+    
+    async def on_scan(self, _):
+        scan_code = self.scan_field.value
+        self.scan_field.value = ""
+        if scan_code:
+            self.submit(scan_code)
+        self.scan_field.focus()
+    
+    def submit(self, scan_code: str):
+        """
+        Queue a scan; returns at once, the lookup runs in the background.
+        Call it on the event loop only, that is where the lookup task is created.
+        """
+        # Imported on first use, like the API client, to keep httpx off the cold-start path
+        from .audit import AuditResult
+        if self.session_started is None:
+            self.session_started = time.perf_counter()
+        
+        settings = self.main_view.settings_store.settings
+        code, error = handle_scan(scan_code, settings.min_scan_length, settings.max_scan_length)
+        result = AuditResult(len(self.results) + 1, scan_code, code, error=error)
+        self.results.append(result)
+        
+        row = self.build_row(result)
+        self.results_list.controls.append(row)
+        # Older rows leave the screen, the session keeps them for the export
+        excess = len(self.results_list.controls) - config.AUDIT_MAX_LIVE_ROWS
+        if excess > 0:
+            del self.results_list.controls[:excess]
+        
+        if error is None:
+            self.in_flight += 1
+            task = asyncio.ensure_future(self.lookup(result, row))
+            self.lookups.add(task)
+            task.add_done_callback(self.lookups.discard)
+        self.update_summary()
+        self.page.update()
+    
+    async def lookup(self, result: "AuditResult", row: ft.Row):
+        try:
+            await self.main_view.ready.wait()
+            async with self.semaphore:
+                # Audit scans are not customer scans: nothing goes to the offline queue,
+                # so a resync never puts them in the history or on the main card
+                result.product, result.error = await self.main_view.api_client.get_product_info(
+                    result.barcode, queue_offline=False
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result.error = f"Error: {e}"
+        finally:
+            self.in_flight -= 1
+        
+        self.fill_row(row, result)
+        self.update_summary()
+        self.page.update()
+    
+    def build_row(self, result: "AuditResult") -> ft.Row:
+        row = ft.Row(
+            [
+                ft.Text(str(result.line), width=40, color=ft.colors.GREY_600),
+                ft.Text(result.barcode or result.input, width=130),
+                ft.Text("", expand=True, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+                ft.Text("…", text_align=ft.TextAlign.RIGHT, width=90, color=ft.colors.GREY_600),
+            ],
+            spacing=8,
+        )
+        if result.error is not None:
+            self.fill_row(row, result)
+        return row
+    
+    def fill_row(self, row: ft.Row, result: "AuditResult"):
+        name_text, price_text = row.controls[2], row.controls[3]
+        if result.product is not None:
+            name_text.value = result.product.name
+            price = result.product.discount_price or result.product.price
+            price_text.value = f"{price:.2f}"
+            price_text.color = ft.colors.GREEN_700 if result.product.discount_price else None
+        else:
+            name_text.value = result.error
+            name_text.color = ft.colors.RED_400
+            price_text.value = ""
+    
+    def update_summary(self):
+        priced = sum(1 for result in self.results if result.product is not None)
+        errors = sum(1 for result in self.results if result.error is not None)
+        rate = 0.0
+        if self.session_started is not None and len(self.results) > 1:
+            rate = len(self.results) / max(time.perf_counter() - self.session_started, 1e-3) * 60
+        self.summary_text.value = (
+            f"{self.t['scanned']}: {len(self.results)} · {self.t['priced']}: {priced} · "
+            f"{self.t['errors']}: {errors} · {self.t['in_progress']}: {self.in_flight} · "
+            f"{rate:.0f} {self.t['per_minute']}"
+        )
+    
+    async def export(self, _):
+        from .audit import write_audit_csv
+        # Lookups still running end within the scan latency budget
+        if self.lookups:
+            await asyncio.wait(set(self.lookups))
+        path = os.path.join(config.AUDIT_EXPORT_DIR, f"audit_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        try:
+            await asyncio.to_thread(write_audit_csv, path, list(self.results))
+            message = f"{self.t['exported_to']} {path}"
+        except OSError as e:
+            print(f"Error exporting audit: {e}")
+            message = f"Error exporting audit: {e}"
+        self.page.snack_bar = ft.SnackBar(content=ft.Text(message), duration=2000)
+        self.page.snack_bar.open = True
+        self.page.update()
+    
+    async def new_session(self, _=None):
+        # Cancelled lookups take themselves off the in-flight count
+        self.close()
+        self.results = []
+        self.session_started = None
+        self.results_list.controls.clear()
+        self.update_summary()
+        self.page.update()
+    
+    def close(self):
+        """Cancel the lookups still running"""
+        for task in list(self.lookups):
+            task.cancel()
+    
+    def go_back(self, _):
+        self.page.go('/')
+
+
 class ScannerApp:
     def __init__(self):
         self.page = None
         self.language = "ukr"  # Default language
+        self.settings_store = SettingsStore()
+        self.startup_timer = StartupTimer()
         
-    def initialize(self, page: ft.Page):
+    async def initialize(self, page: ft.Page):
+        self.startup_timer.mark("initialize")
         self.page = page
         self.page.title = "Scanner Input"
         self.page.padding = 0
@@ -584,46 +1348,140 @@ class ScannerApp:
         
         # disable back button
         self.page.on_view_pop = lambda _: None
-        # Load settings before creating views
-        load_saved_settings(page)
-        
+        # release pooled connections when the session ends
+        self.page.on_close = self.shutdown
         # Store app instance in page data for access from other views
         self.page.data = {"app": self}
         
-        # Load saved settings
-        try:
-            saved_settings = page.client_storage.get("app_settings")
-            settings = json.loads(saved_settings) if saved_settings else {}
-            self.language = settings.get("language", "ukr")
-        except Exception as e:
-            print(f"Error loading settings: {e}")
-            self.language = "ukr"
+        # Stage 1: only a focused scan field, everything else hydrates in the background
+        self.main_view = MainView(page, self.language, settings_store=self.settings_store)
         
-        # Setup routing
-        self.main_view = MainView(page, self.language)
+        # Views are built once and reused until their data changes
+        self.history_view = None
+        self.config_view = None
+        self.diagnostics_view = None
+        self.audit_view = None
         
-        def route_change(route):
-            #print(f"Route changed to: {route.route}")  # Debug print
-            self.page.views.clear()
-            
-            if route.route == "/history":
-                self.page.views.append(HistoryView(page, self.language))
-            elif route.route == "/config":
-                self.page.views.append(ConfigView(page, self.language))
+        self.page.on_route_change = self.route_change
+        # Only schedules route_change, which marks when the scan field is sent
+        self.page.go('/')
+        
+        self.page.run_task(self.hydrate)
+    
+    async def hydrate(self):
+        # Load settings once
+        settings = await self.settings_store.load(self.page)
+        self.settings_store.subscribe(self.on_settings_change)
+        if settings.language != self.language:
+            self.language = settings.language
+            self.main_view.set_language(self.language)
+        self.main_view.apply_scan_settings()
+        self.startup_timer.mark("settings loaded")
+        
+        # Scan history log, offline catalog and queue of scans waiting for the API
+        self.history_store = HistoryStore()
+        self.catalog = ProductCatalog()
+        self.scan_queue = ScanQueue()
+        
+        # Product card, buttons and HTTP client
+        self.main_view.hydrate(catalog=self.catalog, history_store=self.history_store, scan_queue=self.scan_queue)
+        self.page.update()
+        self.startup_timer.mark("main view hydrated")
+        
+        # Replaces the old JSON list in client_storage
+        await self.migrate_history()
+        self.startup_timer.mark("history migrated")
+        
+        # Refreshed from snapshot/delta files
+        await self.sync_catalog()
+        self.startup_timer.mark("catalog synced")
+        
+        # Queued scans survive restarts and resync in the background
+        self.resync_task = self.page.run_task(self.main_view.resync_loop)
+        
+        print(self.startup_timer.report())
+    
+    def route_change(self, route):
+        #print(f"Route changed to: {route.route}")  # Debug print
+        # The main view stays mounted underneath, so returning to it sends no new controls
+        del self.page.views[1:]
+        # A new page starts with a default view, the main view takes its place
+        first_mount = not self.page.views or self.page.views[0] is not self.main_view
+        if first_mount:
+            self.page.views[:] = [self.main_view]
+        
+        if route.route == "/history":
+            if self.history_view is None:
+                self.history_view = HistoryView(self.page, self.language, self.history_store)
+            self.page.views.append(self.history_view)
+        elif route.route == "/config":
+            if self.config_view is None:
+                self.config_view = ConfigView(self.page, self.language, self.settings_store)
+            self.page.views.append(self.config_view)
+        elif route.route == "/diagnostics":
+            if self.diagnostics_view is None:
+                self.diagnostics_view = DiagnosticsView(self.page, self.language, self.main_view)
             else:
-                self.page.views.append(self.main_view)
-                
-            self.page.update()
+                self.diagnostics_view.load()
+            self.page.views.append(self.diagnostics_view)
+        elif route.route == "/audit":
+            if self.audit_view is None:
+                self.audit_view = AuditView(self.page, self.language, self.main_view)
+            self.audit_view.apply_scan_settings()
+            self.page.views.append(self.audit_view)
         
-        self.page.on_route_change = route_change
-        self.page.go('/')
+        # Scanner bursts go to the audit session while it is open
+        if route.route == "/audit":
+            self.page.on_keyboard_event = self.audit_view.handle_keyboard_event
+        else:
+            self.page.on_keyboard_event = self.main_view.handle_keyboard_event
+            
+        self.page.update()
+        if first_mount:
+            self.startup_timer.mark("scan field shown")
+    
+    def invalidate_views(self, history: bool = False):
+        """Drop cached views so the next navigation rebuilds them"""
+        self.config_view = None
+        if history:
+            self.history_view = None
+            self.diagnostics_view = None
+    
+    def on_settings_change(self, old: Settings, new: Settings):
+        if old.language != new.language:
+            self.language = new.language
+            self.main_view.set_language(new.language)
+            # Relabelled rather than rebuilt, an audit session in progress is kept
+            if self.audit_view is not None:
+                self.audit_view.set_language(new.language)
+        self.invalidate_views(history=old.language != new.language)
+
+    async def sync_catalog(self):
+        await asyncio.to_thread(self.catalog.sync_from_files)
+    
+    async def migrate_history(self):
+        """Move history saved by older versions from client_storage into the history log"""
+        try:
+            saved_history = await self.page.client_storage.get_async("scan_history")
+            if saved_history:
+                # Waits for the write; the old copy stays if the import failed
+                await asyncio.to_thread(self.history_store.import_entries, json.loads(saved_history))
+                await self.page.client_storage.remove_async("scan_history")
+        except Exception as e:
+            print(f"Error migrating history: {e}")
     
-    async def change_language(self, new_lang):
-        self.language = new_lang
-        await self.page.client_storage.set_async("language", new_lang)
-        # Update all views
-        self.main_view = MainView(self.page, self.language)
-        self.page.appbar.title.value = TRANSLATIONS[self.language]["app_title"]
-        self.page.go(self.page.route)  # Refresh current route
+    async def shutdown(self, _=None):
+        if getattr(self, "resync_task", None):
+            self.resync_task.cancel()
+        if getattr(self, "audit_view", None):
+            self.audit_view.close()
+        if getattr(self, "main_view", None) and self.main_view.ready.is_set():
+            await self.main_view.api_client.aclose()
+        if getattr(self, "catalog", None):
+            self.catalog.close()
+        if getattr(self, "scan_queue", None):
+            self.scan_queue.close()
+        if getattr(self, "history_store", None):
+            await asyncio.to_thread(self.history_store.close)
 
 app = ScannerApp()
@@ -0,0 +1,288 @@
+"""
+Bulk price audit without the Flet UI: barcodes in, priced rows out.
+
+Codes are validated with handle_scan and looked up through the batch endpoint
+in chunks, several chunks in flight. Rows come out in input order as soon as
+the oldest chunk is done, so memory stays flat however long the input is and
+an interrupted audit can resume after the last row written.
+
+    python audit.py codes.csv -o priced.csv
+    python audit.py codes.csv -o priced.csv --resume
+    cat codes.txt | python audit.py - --format jsonl > priced.jsonl
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, TextIO
+
+from .api_client import APIClient
+from .handlers import handle_scan
+from .models import ProductInfo
+from .settings import Settings
+from . import config
+
+FIELDS = ("line", "input", "barcode", "name", "measurement", "price", "discount", "error")
+
+# Bytes read from the end of an output file to find its last complete row
+RESUME_TAIL = 64 * 1024
+
+
+@dataclass(slots=True)
+class AuditResult:
+    line: int  # input record number, 1-based (header not counted)
+    input: str
+    barcode: Optional[str] = None
+    product: Optional[ProductInfo] = None
+    error: Optional[str] = None
+
+    def to_row(self) -> dict:
+        """CSV row; money as exact decimal strings"""
+        product = self.product
+        return {
+            "line": self.line,
+            "input": self.input,
+            "barcode": self.barcode or "",
+            "name": product.name if product else "",
+            "measurement": product.measurement if product else "",
+            "price": str(product.price) if product else "",
+            "discount": str(product.discount_price) if product and product.discount_price is not None else "",
+            "error": self.error or "",
+        }
+
+    def to_json(self) -> dict:
+        product = self.product
+        return {
+            "line": self.line,
+            "input": self.input,
+            "barcode": self.barcode,
+            "name": product.name if product else None,
+            "measurement": product.measurement if product else None,
+            "price": float(product.price) if product else None,
+            "discount": float(product.discount_price) if product and product.discount_price is not None else None,
+            "error": self.error,
+        }
+
+
+class AuditClient(APIClient):
+    """APIClient whose debug output goes to stderr, so priced rows can go to stdout"""
+
+    verbose = False
+
+    async def show_debug(self, message: str):
+        if self.verbose:
+            print(f"[DEBUG] {message}", file=sys.stderr)
+
+
+def read_codes(f: TextIO, column: Optional[str] = None) -> Iterator[tuple[int, str]]:
+    """
+    (record number, raw code) for each non-empty input record.
+    `column` names the code column in a header row; without it the first column is used.
+    """
+    reader = csv.reader(f)
+    index = 0
+    if column is not None:
+        header = next(reader, [])
+        if column not in header:
+            raise ValueError(f"No column {column!r} in the input header")
+        index = header.index(column)
+
+    for number, record in enumerate(reader, 1):
+        if len(record) > index and record[index].strip():
+            yield number, record[index]
+
+
+def _take(items: Iterator, count: int) -> list:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == count:
+            break
+    return chunk
+
+
+async def lookup_chunk(client: APIClient, items: list[tuple[int, str]]) -> list[AuditResult]:
+    """Validate a chunk of codes and price the valid ones with one batch request"""
+    results = []
+    for line, raw in items:
+        code, error = handle_scan(raw)
+        results.append(AuditResult(line, raw, code, error=error))
+
+    valid = [result for result in results if result.error is None]
+    if valid:
+        answers = await client.get_products(
+            [result.barcode for result in valid], chunk_size=len(valid), concurrency=1
+        )
+        for result, (product, error) in zip(valid, answers):
+            result.product = product
+            result.error = error
+    return results
+
+
+async def audit(
+    client: APIClient,
+    items: Iterator[tuple[int, str]],
+    chunk_size: int = config.BATCH_CHUNK_SIZE,
+    concurrency: int = config.BATCH_CONCURRENCY,
+) -> AsyncIterator[AuditResult]:
+    """Results in input order, with up to `concurrency` chunks being looked up at a time"""
+    in_flight: deque[asyncio.Task] = deque()
+    try:
+        while True:
+            # Read off the event loop, a slow stdin must not stall the lookups in flight
+            chunk = await asyncio.to_thread(_take, items, chunk_size)
+            if chunk:
+                in_flight.append(asyncio.ensure_future(lookup_chunk(client, chunk)))
+            if in_flight and (len(in_flight) >= concurrency or not chunk):
+                for result in await in_flight.popleft():
+                    yield result
+            elif not chunk:
+                return
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+def write_audit_csv(path: str, results: list[AuditResult]):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(result.to_row() for result in results)
+
+
+def resume_point(path: str, fmt: str) -> int:
+    """
+    Line number of the last complete row of an interrupted output file, 0 if there is none.
+    A half-written last row is cut off, so appending continues on a clean line.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - RESUME_TAIL, 0))
+        tail = f.read()
+        end = tail.rfind(b"\n")
+        if end < 0:
+            f.truncate(0)
+            return 0
+        f.truncate(size - len(tail) + end + 1)
+
+    last = tail[tail.rfind(b"\n", 0, end) + 1:end].decode("utf-8")
+    try:
+        if fmt == "jsonl":
+            return int(json.loads(last)["line"])
+        return int(next(csv.reader([last]))[0])
+    except (ValueError, KeyError, StopIteration):
+        # Only the CSV header so far
+        return 0
+
+
+class Summary:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.priced = 0
+        self.invalid = 0
+        self.unresolved = 0
+
+    def add(self, result: AuditResult):
+        self.rows += 1
+        if result.product is not None:
+            self.priced += 1
+        elif result.barcode is None:
+            self.invalid += 1
+        else:
+            self.unresolved += 1
+
+    def report(self, client: APIClient) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0.0
+        stats = client.stats()
+        return (
+            f"{self.rows} rows in {elapsed:.1f} s ({rate:.0f} rows/s): "
+            f"{self.priced} priced, {self.invalid} invalid, {self.unresolved} not resolved | "
+            f"conn {stats['connections_opened']} new / {stats['connections_reused']} reused, "
+            f"{stats['retries']} retries"
+        )
+
+
+async def run(args: argparse.Namespace) -> Summary:
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    to_stdout = args.output == "-"
+    skip = resume_point(args.output, fmt) if args.resume and not to_stdout else 0
+    if skip:
+        print(f"Resuming after input line {skip}", file=sys.stderr)
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    if to_stdout:
+        out = sys.stdout
+    else:
+        out = open(args.output, "a" if args.resume else "w", newline="", encoding="utf-8")
+    writer = csv.DictWriter(out, FIELDS, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None and (to_stdout or out.tell() == 0):
+        writer.writeheader()
+
+    client = AuditClient(args.url, args.api_key, prefetch=False)
+    client.verbose = args.verbose
+    summary = Summary()
+    try:
+        items = (item for item in read_codes(source, args.column) if item[0] > skip)
+        async for result in audit(client, items, args.chunk_size, args.concurrency):
+            if writer is not None:
+                writer.writerow(result.to_row())
+            else:
+                out.write(json.dumps(result.to_json(), ensure_ascii=False) + "\n")
+            summary.add(result)
+            # Whole chunks reach the disk, what is on disk is safe to resume from
+            if summary.rows % args.chunk_size == 0:
+                out.flush()
+    finally:
+        out.flush()
+        if not to_stdout:
+            out.close()
+        if source is not sys.stdin:
+            source.close()
+        print(summary.report(client), file=sys.stderr)
+        await client.aclose()
+    return summary
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = Settings()
+    parser = argparse.ArgumentParser(description="Price a list of barcodes through the product API")
+    parser.add_argument("input", help="CSV or text file with one barcode per line, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout (default)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the output extension, else csv")
+    parser.add_argument("--column", help="name of the barcode column in a header row (default: first column, no header)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted audit in the output file")
+    parser.add_argument("--url", default=os.getenv("PRICECHECKER_API_URL", defaults.api_url))
+    parser.add_argument("--api-key", default=os.getenv("PRICECHECKER_API_KEY", defaults.api_key))
+    parser.add_argument("--chunk-size", type=int, default=config.BATCH_CHUNK_SIZE, help="codes per request")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--verbose", action="store_true", help="print APIClient debug messages to stderr")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.concurrency < 1:
+        parser.error("--chunk-size and --concurrency must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("Interrupted, run again with --resume to continue", file=sys.stderr)
+        sys.exit(130)
+    except BrokenPipeError:
+        # Output piped into e.g. head, which stopped reading
+        sys.stdout = open(os.devnull, "w")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from typing import Optional
+from pricechecker.config import VARIABLE_WEIGHT_PREFIXES, VARIABLE_PRICE_PREFIXES
+
+# GTIN symbologies by number of digits
+SYMBOLOGIES = {
+    8: "EAN-8",
+    12: "UPC-A",
+    13: "EAN-13",
+    14: "GTIN-14",
+}
+INTERNAL = "INTERNAL"
+
+
+@dataclass
+class Barcode:
+    raw: str
+    symbology: str
+    # Canonical lookup key: GTIN-14 (value part zeroed for variable-measure items),
+    # or the raw value for internal codes
+    code: str
+    # Set for GS1 restricted-circulation codes: "weight" (grams) or "price" (minor units)
+    variable_measure: Optional[str] = None
+    measure_value: Optional[int] = None
+
+
+def gtin_check_digit(digits: str) -> int:
+    """GS1 mod-10 check digit for the digits before the check position"""
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        total += int(digit) * (3 if i % 2 == 0 else 1)
+    return (10 - total % 10) % 10
+
+
+def parse_barcode(value: str) -> tuple[Optional[Barcode], Optional[str]]:
+    """
+    Detect the symbology, verify the check digit and normalize to GTIN-14
+    Returns: (barcode, error_message)
+    """
+    symbology = SYMBOLOGIES.get(len(value)) if value.isdigit() else None
+    if symbology is None:
+        return Barcode(raw=value, symbology=INTERNAL, code=value), None
+
+    if gtin_check_digit(value[:-1]) != int(value[-1]):
+        return None, f"Invalid {symbology} check digit"
+
+    gtin = value.zfill(14)
+    barcode = Barcode(raw=value, symbology=symbology, code=gtin)
+
+    # Restricted-circulation EAN-13: 2P IIIII VVVVV C, value is weight or price
+    if symbology == "EAN-13":
+        prefix = value[:2]
+        if prefix in VARIABLE_WEIGHT_PREFIXES:
+            barcode.variable_measure = "weight"
+        elif prefix in VARIABLE_PRICE_PREFIXES:
+            barcode.variable_measure = "price"
+
+        if barcode.variable_measure:
+            barcode.measure_value = int(value[7:12])
+            item = value[:7] + "00000"
+            barcode.code = (item + str(gtin_check_digit(item))).zfill(14)
+
+    return barcode, None
+
+
+def normalize_code(value: str) -> str:
+    """Canonical lookup key for a barcode, or the value itself if it is not a valid GTIN"""
+    barcode, error = parse_barcode(value.strip())
+    return barcode.code if barcode else value.strip()
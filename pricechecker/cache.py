@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from .models import ProductInfo
+from . import config
+
+
+class ProductCache:
+    """Bounded in-memory ProductInfo cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, max_size: int = config.CACHE_MAX_SIZE, ttl: float = config.CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # barcode -> (expires_at, product, etag, last_modified), least recently used first
+        self._entries: OrderedDict[str, tuple[float, ProductInfo, Optional[str], Optional[str]]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[ProductInfo]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, product = entry[:2]
+        if expires_at <= time.monotonic():
+            # Expired entries stay until evicted so they can still be shown as stale
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return product
+
+    def peek(self, key: str) -> Optional[tuple[ProductInfo, bool]]:
+        """
+        Return a cached product even if expired, without touching LRU order or stats
+        Returns: (product, is_fresh) or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, product = entry[:2]
+        return product, expires_at > time.monotonic()
+
+    def validators(self, key: str) -> tuple[Optional[str], Optional[str]]:
+        """(etag, last_modified) the server sent with the cached product, for conditional requests"""
+        entry = self._entries.get(key)
+        return (entry[2], entry[3]) if entry else (None, None)
+
+    def put(
+        self,
+        key: str,
+        product: ProductInfo,
+        ttl: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, product, etag, last_modified)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def touch(self, key: str, ttl: Optional[float] = None) -> Optional[ProductInfo]:
+        """Restart the TTL of an entry the server confirmed unchanged; returns its product"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, *entry[1:])
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def cap_ttl(self, ttl: float):
+        """Make every entry expire within `ttl` seconds, e.g. once price changes stop arriving"""
+        latest = time.monotonic() + ttl
+        for key, entry in self._entries.items():
+            if entry[0] > latest:
+                self._entries[key] = (latest, *entry[1:])
+
+    def keys(self) -> list[str]:
+        return list(self._entries)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._entries),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Iterator, Optional
+from .models import ProductInfo, money
+from .barcode import normalize_code
+from . import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_products (
+    barcode TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    measurement TEXT NOT NULL,
+    price REAL NOT NULL,
+    discount_price REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _read_as_of(path: str) -> datetime:
+    """
+    Snapshot and delta files are JSON Lines: the first line is a header
+    ({"as_of": "<iso timestamp>"}), every other line is a product.
+    """
+    with open(path, encoding="utf-8") as f:
+        return datetime.fromisoformat(json.loads(f.readline())["as_of"])
+
+
+def _read_products(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _product_row(item: dict) -> tuple:
+    discount = item.get("discountPrice", item.get("discount_price"))
+    return (
+        normalize_code(str(item["barcode"])),
+        item.get("name", ""),
+        item.get("measurement", ""),
+        float(item.get("price", 0)),
+        float(discount) if discount else None,
+    )
+
+
+class ProductCatalog:
+    """Local product catalog snapshot stored in SQLite, used when the API is slow or down"""
+
+    def __init__(self, db_path: str = config.CATALOG_DB_PATH):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._as_of: Optional[datetime] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Read connection, used from the event loop"""
+        if self._conn is None:
+            self._conn = self._connect()
+            row = self._conn.execute(
+                "SELECT value FROM catalog_meta WHERE key = 'as_of'"
+            ).fetchone()
+            self._as_of = datetime.fromisoformat(row[0]) if row else None
+        return self._conn
+
+    @property
+    def as_of(self) -> Optional[datetime]:
+        self.conn
+        return self._as_of
+
+    def lookup(self, barcode: str) -> Optional[ProductInfo]:
+        row = self.conn.execute(
+            "SELECT name, measurement, price, discount_price FROM catalog_products WHERE barcode = ?",
+            (barcode,),
+        ).fetchone()
+        if row is None:
+            return None
+        return ProductInfo(
+            name=row[0],
+            measurement=row[1],
+            price=money(row[2]),
+            discount_price=money(row[3]),
+            catalog_as_of=self._as_of,
+        )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM catalog_products").fetchone()[0]
+
+    def apply_change(self, barcode: str, item: Optional[dict]):
+        """
+        Apply a pushed price change to a product already in the catalog;
+        `item` None removes it. Products the catalog does not list are not added.
+        """
+        with self.conn:
+            if item is None:
+                self.conn.execute("DELETE FROM catalog_products WHERE barcode = ?", (barcode,))
+                return
+            code, name, measurement, price, discount_price = _product_row({**item, "barcode": barcode})
+            self.conn.execute(
+                "UPDATE catalog_products SET name = ?, measurement = ?, price = ?, discount_price = ? "
+                "WHERE barcode = ?",
+                (name, measurement, price, discount_price, code),
+            )
+
+    # Bulk loading runs on its own connection so lookups keep working meanwhile
+
+    def load_snapshot(self, path: str) -> int:
+        """Replace the whole catalog with a full snapshot file"""
+        as_of = _read_as_of(path)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM catalog_products")
+                cursor = conn.executemany(
+                    "INSERT OR REPLACE INTO catalog_products VALUES (?, ?, ?, ?, ?)",
+                    (_product_row(item) for item in _read_products(path)),
+                )
+                count = cursor.rowcount
+                self._set_as_of(conn, as_of)
+        finally:
+            conn.close()
+        print(f"Catalog snapshot loaded: {count} products as of {as_of.isoformat()}")
+        return count
+
+    def apply_delta(self, path: str) -> int:
+        """Apply a delta file; lines with "deleted": true remove the product"""
+        as_of = _read_as_of(path)
+        if self.as_of is not None and as_of <= self.as_of:
+            return 0
+
+        conn = self._connect()
+        count = 0
+        try:
+            with conn:
+                for item in _read_products(path):
+                    if item.get("deleted"):
+                        conn.execute(
+                            "DELETE FROM catalog_products WHERE barcode = ?",
+                            (normalize_code(str(item["barcode"])),),
+                        )
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO catalog_products VALUES (?, ?, ?, ?, ?)",
+                            _product_row(item),
+                        )
+                    count += 1
+                self._set_as_of(conn, as_of)
+        finally:
+            conn.close()
+        print(f"Catalog delta applied: {count} changes as of {as_of.isoformat()}")
+        return count
+
+    def _set_as_of(self, conn: sqlite3.Connection, as_of: datetime):
+        conn.execute(
+            "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('as_of', ?)",
+            (as_of.isoformat(),),
+        )
+        self._as_of = as_of
+
+    def sync_from_files(
+        self,
+        snapshot_path: str = config.CATALOG_SNAPSHOT_PATH,
+        deltas_dir: str = config.CATALOG_DELTAS_DIR,
+    ):
+        """Load the snapshot if it is newer than the catalog, then apply newer deltas in order"""
+        try:
+            if os.path.exists(snapshot_path):
+                as_of = _read_as_of(snapshot_path)
+                if self.as_of is None or as_of > self.as_of:
+                    self.load_snapshot(snapshot_path)
+
+            if os.path.isdir(deltas_dir):
+                for name in sorted(os.listdir(deltas_dir)):
+                    if name.endswith(".jsonl"):
+                        self.apply_delta(os.path.join(deltas_dir, name))
+        except Exception as e:
+            print(f"Error syncing catalog: {e}")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,66 @@
+import time
+from typing import Callable, Optional
+from . import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of a request while the backend is considered down"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing backend for a while.
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    fail fast; once `reset_timeout` seconds pass a single probe is let through,
+    and its result closes the circuit or opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = config.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = config.CIRCUIT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """True if a request may go out now"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def release_probe(self):
+        """The probe was abandoned without an answer, let the next request probe instead"""
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = self.clock()
+            self.probe_in_flight = False
@@ -10,8 +10,84 @@ DEBUG = True
 
 # Database settings
 DB_PATH = os.path.join('data', 'scans.db')
+# Own file: the bulk snapshot load holds a long write transaction that would lock out history writes
+CATALOG_DB_PATH = os.path.join('data', 'catalog.db')
 
 # Scanner settings
 SCAN_TIMEOUT = 1.0  # seconds
-MIN_SCAN_LENGTH = 12
-MAX_SCAN_LENGTH = 13
\ No newline at end of file
+MIN_SCAN_LENGTH = 8  # EAN-8
+MAX_SCAN_LENGTH = 14  # GTIN-14
+
+# GS1 restricted-circulation EAN-13 prefixes for variable-measure items
+VARIABLE_WEIGHT_PREFIXES = ("21", "22", "23", "24", "25")  # value is weight in grams
+VARIABLE_PRICE_PREFIXES = ("26", "27", "28", "29")  # value is price in minor units
+
+# HTTP client settings
+HTTP_TIMEOUT = 5.0  # seconds, for writes and waiting on the connection pool
+HTTP_CONNECT_TIMEOUT = 1.0  # seconds, including DNS
+HTTP_READ_TIMEOUT = 2.5  # seconds between bytes of the response
+HTTP2 = False  # requires the optional "h2" package
+HTTP_MAX_CONNECTIONS = 10
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 5
+HTTP_KEEPALIVE_EXPIRY = 60.0  # seconds
+
+# Request resilience
+SCAN_LATENCY_BUDGET = 3.0  # seconds a scan may wait for the API before falling back or failing
+RETRY_ATTEMPTS = 2  # extra attempts after connection errors, timeouts and 502/503/504
+RETRY_BACKOFF = 0.1  # seconds, base of the jittered exponential backoff
+RETRY_BACKOFF_MAX = 1.0  # seconds
+HEDGE_ENABLED = True  # send a second request when the first is slower than the p95
+HEDGE_MIN_SAMPLES = 20  # response samples needed before hedging starts
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failed requests that open the circuit
+CIRCUIT_RESET_TIMEOUT = 10.0  # seconds before a probe request is let through
+
+# Product cache settings
+CACHE_MAX_SIZE = 500  # products
+CACHE_TTL = 60.0  # seconds, upper bound on how long a price change can stay hidden
+CACHE_TTL_STREAMING = 3600.0  # seconds, while the price stream delivers changes as they happen
+
+# Price-change stream (GET /events/prices, server-sent events)
+PRICE_STREAM_ENABLED = True
+PRICE_STREAM_READ_TIMEOUT = 45.0  # seconds without data, the server sends keep-alives every 15
+PRICE_STREAM_RECONNECT_MAX = 30.0  # seconds, cap of the reconnect backoff
+
+# Offline catalog settings (stored in CATALOG_DB_PATH)
+CATALOG_SNAPSHOT_PATH = os.path.join('data', 'catalog_snapshot.jsonl')
+CATALOG_DELTAS_DIR = os.path.join('data', 'catalog_deltas')
+CATALOG_FALLBACK_AFTER = 1.5  # seconds to wait for the API before answering from the catalog
+
+# Batch lookup settings (GET /products?codes=...)
+BATCH_CHUNK_SIZE = 100  # codes per request
+BATCH_CONCURRENCY = 4  # chunk requests in flight
+
+# Prefetch of likely next scans after a lookup (one batch request per scan)
+PREFETCH_ENABLED = True
+PREFETCH_MAX_CODES = 8  # codes warmed per scan
+PREFETCH_CONCURRENCY = 2  # prefetches kept in flight, older ones are cancelled
+PREFETCH_HISTORY_WINDOW = 200  # recent scans of a code checked for what was scanned next
+
+# Offline scan queue (stored in DB_PATH), retried once the API is reachable again
+RESYNC_INTERVAL = 5.0  # seconds between resync batches
+RESYNC_JITTER = 5.0  # random extra seconds, so terminals coming back online do not resync in lockstep
+RESYNC_BATCH_SIZE = 20  # queued scans per resync request
+RESYNC_BACKOFF_MAX = 300.0  # seconds, cap of the per-scan retry backoff
+
+# Audit mode (rapid stock-check scanning)
+AUDIT_CONCURRENCY = 8  # lookups in flight, further scans wait in the queue
+AUDIT_MAX_LIVE_ROWS = 200  # result rows kept on screen, the export has all of them
+AUDIT_EXPORT_DIR = 'data'
+
+# Scan history settings (stored in DB_PATH)
+HISTORY_MAX_ENTRIES = 5000  # scans kept after compaction
+HISTORY_MAX_AGE_DAYS = 30  # None keeps scans regardless of age
+HISTORY_COMPACT_EVERY = 100  # appends between compactions
+HISTORY_PAGE_SIZE = 50  # entries loaded per history page
+HISTORY_MAX_LIVE_ITEMS = 150  # history controls kept on screen while scrolling
+HISTORY_WRITE_RETRIES = 8  # attempts of a write that found the database locked
+HISTORY_WRITE_BACKOFF = 0.25  # seconds, doubled after each locked attempt
+HISTORY_WRITE_BACKOFF_MAX = 5.0  # seconds
+
+# Latency instrumentation
+LATENCY_METRICS = True  # record per-stage scan timings in memory
+LATENCY_WINDOW = 1000  # most recent samples kept per stage
+LATENCY_EXPORT_PATH = os.path.join('data', 'latency.json')
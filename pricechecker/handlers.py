@@ -1,9 +1,15 @@
 from pricechecker.config import MIN_SCAN_LENGTH, MAX_SCAN_LENGTH
+from pricechecker.barcode import Barcode, parse_barcode
 
-def handle_scan(scan_input: str) -> tuple[str | None, str | None]:
+def parse_scan(
+    scan_input: str,
+    min_length: int = MIN_SCAN_LENGTH,
+    max_length: int = MAX_SCAN_LENGTH,
+) -> tuple[Barcode | None, str | None]:
     """
-    Process and validate scanner input
-    Returns: (processed_value, error_message)
+    Process and validate scanner input, keeping the weight or price
+    encoded in variable-measure labels
+    Returns: (barcode, error_message)
     """
     try:
         # Basic cleaning
@@ -13,17 +19,32 @@ def handle_scan(scan_input: str) -> tuple[str | None, str | None]:
         cleaned = cleaned.replace('\r', '').replace('\n', '')
         
         # Validate length
-        if len(cleaned) < MIN_SCAN_LENGTH:
-            return None, f"Scan too short (minimum {MIN_SCAN_LENGTH} characters)"
+        if len(cleaned) < min_length:
+            return None, f"Scan too short (minimum {min_length} characters)"
             
-        if len(cleaned) > MAX_SCAN_LENGTH:
-            return None, f"Scan too long (maximum {MAX_SCAN_LENGTH} characters)"
+        if len(cleaned) > max_length:
+            return None, f"Scan too long (maximum {max_length} characters)"
             
         # Validate characters
         if not cleaned.isprintable():
             return None, "Contains invalid characters"
-            
-        return cleaned, None
+        
+        # Reject misreads locally and normalize GTINs to GTIN-14
+        return parse_barcode(cleaned)
         
     except Exception as e:
-        return None, f"Error processing scan: {str(e)}"
\ No newline at end of file
+        return None, f"Error processing scan: {str(e)}"
+
+def handle_scan(
+    scan_input: str,
+    min_length: int = MIN_SCAN_LENGTH,
+    max_length: int = MAX_SCAN_LENGTH,
+) -> tuple[str | None, str | None]:
+    """
+    Process and validate scanner input
+    Returns: (canonical_code, error_message)
+    """
+    barcode, error = parse_scan(scan_input, min_length, max_length)
+    if error:
+        return None, error
+    return barcode.code, None
\ No newline at end of file
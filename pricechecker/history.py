@@ -0,0 +1,325 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Optional
+from .barcode import INTERNAL, parse_barcode
+from .models import money
+from . import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    barcode TEXT NOT NULL,
+    name TEXT NOT NULL,
+    measurement TEXT NOT NULL,
+    price REAL NOT NULL,
+    discount_price REAL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scan_history_barcode ON scan_history (barcode, id);
+-- Prefix search without the GTIN-14 zero padding
+CREATE INDEX IF NOT EXISTS scan_history_barcode_unpadded ON scan_history (ltrim(barcode, '0'));
+"""
+
+# Full-text index on product names, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE scan_history_fts USING fts5(name, content='scan_history', content_rowid='id');
+CREATE TRIGGER scan_history_ai AFTER INSERT ON scan_history BEGIN
+    INSERT INTO scan_history_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER scan_history_ad AFTER DELETE ON scan_history BEGIN
+    INSERT INTO scan_history_fts (scan_history_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+INSERT INTO scan_history_fts (scan_history_fts) VALUES ('rebuild');
+"""
+
+COLUMNS = "id, barcode, name, measurement, price, discount_price, timestamp"
+
+_CLOSE = object()
+
+
+def _entry_row(entry: dict) -> tuple:
+    product = entry["product"]
+    # Entries saved by older versions spell it discount_price
+    discount = money(product.get("discountPrice", product.get("discount_price")))
+    # Money may come in as Decimal, float or string; the columns are REAL
+    return (
+        entry["barcode"],
+        product["name"],
+        product["measurement"],
+        float(money(product["price"])),
+        float(discount) if discount is not None else None,
+        entry["timestamp"],
+    )
+
+
+def _row_entry(row: tuple) -> dict:
+    return {
+        "id": row[0],
+        "barcode": row[1],
+        "product": {
+            "name": row[2],
+            "measurement": row[3],
+            "price": row[4],
+            "discountPrice": row[5],
+        },
+        "timestamp": row[6],
+    }
+
+
+class HistoryStore:
+    """
+    Append-only scan history in SQLite (WAL).
+    Writes are queued to a background thread so they never run on the scan path;
+    every `compact_every` appends the log is trimmed to the retention limits.
+    """
+
+    def __init__(
+        self,
+        db_path: str = config.DB_PATH,
+        max_entries: int = config.HISTORY_MAX_ENTRIES,
+        max_age_days: Optional[int] = config.HISTORY_MAX_AGE_DAYS,
+        compact_every: int = config.HISTORY_COMPACT_EVERY,
+        write_retries: int = config.HISTORY_WRITE_RETRIES,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.compact_every = compact_every
+        self.write_retries = write_retries
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._appends_since_compact = 0
+        self.has_fts: Optional[bool] = None
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Reader and writer connect from different threads
+        with self._schema_lock:
+            conn.executescript(SCHEMA)
+            self._ensure_fts(conn)
+        return conn
+
+    def _ensure_fts(self, conn: sqlite3.Connection):
+        if self.has_fts is not None:
+            return
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'scan_history_fts'"
+        ).fetchone()
+        try:
+            if not exists:
+                conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5, name search falls back to LIKE
+            print(f"History name index unavailable: {e}")
+            self.has_fts = False
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Read connection, used from the event loop"""
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    # Writes
+
+    def _submit(self, *op):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+            self._writer.start()
+        self._queue.put(op)
+
+    def append(self, entry: dict):
+        """Queue one scan for writing; returns immediately"""
+        self._submit("append", entry)
+
+    def import_entries(self, entries: list[dict]):
+        """
+        Write older entries (newest first, as stored in client_storage).
+        Blocks until they are on disk and raises if the import failed, so the
+        caller only deletes its copy once the entries are safe.
+        """
+        done = Future()
+        self._submit("import", entries, done)
+        done.result()
+
+    def clear(self):
+        self._submit("clear")
+
+    def compact(self):
+        self._submit("compact")
+
+    def flush(self):
+        """Wait until all queued writes are on disk"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                op = self._queue.get()
+                # Imports carry a future to report the outcome to the caller
+                done = op[-1] if op is not _CLOSE and isinstance(op[-1], Future) else None
+                try:
+                    if op is _CLOSE:
+                        return
+                    self._apply_with_retry(conn, op)
+                    if done is not None:
+                        done.set_result(None)
+                except Exception as e:
+                    print(f"Error writing history: {e}")
+                    if done is not None:
+                        done.set_exception(e)
+                finally:
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _apply_with_retry(self, conn: sqlite3.Connection, op: tuple):
+        """A locked or busy database is retried with backoff, other errors are not"""
+        delay = config.HISTORY_WRITE_BACKOFF
+        for attempt in range(self.write_retries):
+            try:
+                return self._apply(conn, op)
+            except sqlite3.OperationalError as e:
+                transient = "locked" in str(e) or "busy" in str(e)
+                if not transient or attempt == self.write_retries - 1:
+                    raise
+                print(f"History database busy, retrying in {delay:g} s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, config.HISTORY_WRITE_BACKOFF_MAX)
+
+    def _apply(self, conn: sqlite3.Connection, op: tuple):
+        kind = op[0]
+        with conn:
+            if kind == "append":
+                conn.execute(
+                    "INSERT INTO scan_history (barcode, name, measurement, price, discount_price, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    _entry_row(op[1]),
+                )
+                self._appends_since_compact += 1
+                if self._appends_since_compact >= self.compact_every:
+                    self._compact(conn)
+            elif kind == "import":
+                conn.executemany(
+                    "INSERT INTO scan_history (barcode, name, measurement, price, discount_price, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (_entry_row(entry) for entry in reversed(op[1])),
+                )
+            elif kind == "clear":
+                conn.execute("DELETE FROM scan_history")
+            elif kind == "compact":
+                self._compact(conn)
+
+    def _compact(self, conn: sqlite3.Connection):
+        self._appends_since_compact = 0
+        if self.max_age_days:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            conn.execute("DELETE FROM scan_history WHERE timestamp < ?", (cutoff,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM scan_history WHERE id <= "
+                "(SELECT id FROM scan_history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_CLOSE)
+            self._writer.join()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # Reads
+
+    def recent(self, limit: int) -> list[dict]:
+        """Newest entries first"""
+        return self.page(limit)
+
+    def page(
+        self,
+        limit: int,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        query: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        One page of entries next to a known id (keyset pagination), newest first.
+        `query` matches a barcode prefix (digits) or words of the product name, using indexes.
+        """
+        conn = self.conn
+        where, params = [], []
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(before_id)
+        if after_id is not None:
+            where.append("id > ?")
+            params.append(after_id)
+
+        query = (query or "").strip()
+        if query.isdigit():
+            # Canonical codes are GTIN-14 with up to 6 leading zeros: match the
+            # prefix after the padding, and a complete GTIN by its canonical key
+            unpadded = query.lstrip("0") or query
+            match = ["(ltrim(barcode, '0') >= ? AND ltrim(barcode, '0') < ?)"]
+            params += [unpadded, unpadded + "\uffff"]
+            barcode, error = parse_barcode(query)
+            if barcode is not None and barcode.symbology != INTERNAL:
+                match.append("barcode = ?")
+                params.append(barcode.code)
+            where.append("(" + " OR ".join(match) + ")")
+        elif query and self.has_fts:
+            terms = " ".join('"' + term.replace('"', '""') + '"*' for term in query.split())
+            where.append("id IN (SELECT rowid FROM scan_history_fts WHERE scan_history_fts MATCH ?)")
+            params.append(terms)
+        elif query:
+            where.append("name LIKE ?")
+            params.append(f"%{query}%")
+
+        sql = f"SELECT {COLUMNS} FROM scan_history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # Pages after a known id are read oldest first so they start right next to it
+        sql += " ORDER BY id ASC LIMIT ?" if after_id is not None else " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = conn.execute(sql, params).fetchall()
+        if after_id is not None:
+            rows.reverse()
+        return [_row_entry(row) for row in rows]
+
+    def scanned_after(
+        self, barcode: str, limit: int, window: int = config.PREFETCH_HISTORY_WINDOW
+    ) -> list[str]:
+        """Barcodes most often scanned right after `barcode`, over its last `window` scans"""
+        rows = self.conn.execute(
+            "SELECT next.barcode, COUNT(*) AS times FROM "
+            "(SELECT id FROM scan_history WHERE barcode = ? ORDER BY id DESC LIMIT ?) AS scan "
+            "JOIN scan_history AS next ON next.id = scan.id + 1 "
+            "WHERE next.barcode != ? "
+            "GROUP BY next.barcode ORDER BY times DESC, MAX(next.id) DESC LIMIT ?",
+            (barcode, window, barcode, limit),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def latest_for(self, barcode: str) -> Optional[dict]:
+        row = self.conn.execute(
+            f"SELECT {COLUMNS} FROM scan_history WHERE barcode = ? ORDER BY id DESC LIMIT 1",
+            (barcode,),
+        ).fetchone()
+        return _row_entry(row) if row else None
@@ -30,6 +30,28 @@ TRANSLATIONS = {
         "barcode": "Barcode",
         "discount": "Discount",
         "api_key": "API Key",
+        "catalog_as_of": "Offline catalog as of",
+        "possibly_stale": "Price may be outdated, checking...",
+        "search": "Search by barcode or name",
+        "diagnostics": "Diagnostics",
+        "refresh": "Refresh",
+        "export": "Export",
+        "reset": "Reset",
+        "stage": "Stage",
+        "no_samples": "No scans measured yet",
+        "exported_to": "Exported to",
+        "pending": "No connection, the price will load once it is back",
+        "scan_pending": "Scan queued until the connection is back",
+        "pending_synced": "Pending scans synced",
+        "audit": "Audit",
+        "priced": "Priced",
+        "errors": "Errors",
+        "in_progress": "In progress",
+        "per_minute": "scans/min",
+        "new_session": "New session",
+        "weight": "Weight, kg",
+        "total": "Total",
+        "label_price": "Label price",
     },
     "ukr": {
         "app_title": "Перевірка цін",
@@ -62,5 +84,27 @@ TRANSLATIONS = {
         "barcode": "Штрихкод",
         "discount": "Знижка",
         "api_key": "API ключ",
+        "catalog_as_of": "Офлайн-каталог станом на",
+        "possibly_stale": "Ціна може бути застарілою, перевіряємо...",
+        "search": "Пошук за штрихкодом або назвою",
+        "diagnostics": "Діагностика",
+        "refresh": "Оновити",
+        "export": "Експорт",
+        "reset": "Скинути",
+        "stage": "Етап",
+        "no_samples": "Ще немає вимірів сканування",
+        "exported_to": "Експортовано до",
+        "pending": "Немає зв'язку, ціна завантажиться після відновлення",
+        "scan_pending": "Сканування в черзі до відновлення зв'язку",
+        "pending_synced": "Відкладені сканування синхронізовано",
+        "audit": "Ревізія",
+        "priced": "З ціною",
+        "errors": "Помилки",
+        "in_progress": "В обробці",
+        "per_minute": "скан./хв",
+        "new_session": "Нова сесія",
+        "weight": "Вага, кг",
+        "total": "Сума",
+        "label_price": "Ціна на етикетці",
     }
 } 
\ No newline at end of file
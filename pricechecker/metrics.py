@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+from . import config
+
+# Scan path stages in the order they happen, used for reports
+STAGES = (
+    "input",      # scanner burst, first key to terminator
+    "validate",   # handle_scan: length, check digit, GTIN-14
+    "cache",      # in-memory cache lookup
+    "catalog",    # offline catalog lookup
+    "connect",    # new TCP connection, including DNS
+    "tls",        # TLS handshake on a new connection
+    "response",   # request sent to response headers received
+    "server",     # backend processing time from the Server-Timing header
+    "network",    # response time not spent on the server
+    "decode",     # response body to ProductInfo
+    "api",        # single product request, start to decoded ProductInfo
+    "render",     # product card update and page.update
+    "history",    # queueing the history entry
+    "scan",       # scan submitted to price on screen
+)
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, round(p / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def parse_server_timing(header: Optional[str]) -> Optional[float]:
+    """Total `dur` in seconds from a Server-Timing header (milliseconds per metric)"""
+    if not header:
+        return None
+    total = None
+    for metric in header.split(","):
+        for param in metric.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "dur":
+                try:
+                    total = (total or 0.0) + float(value.strip('"')) / 1000
+                except ValueError:
+                    pass
+    return total
+
+
+class LatencyMetrics:
+    """
+    Rolling per-stage latency samples kept in memory.
+    Recording is an append to a bounded deque, so it is cheap enough for the
+    scan path; percentiles are computed only when a report is requested.
+    """
+
+    def __init__(self, window: int = config.LATENCY_WINDOW, enabled: bool = config.LATENCY_METRICS):
+        self.window = window
+        self.enabled = enabled
+        self._samples: dict[str, deque] = {}
+        self.started_at = datetime.now()
+
+    def record(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Record the duration of a `with` block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def clear(self):
+        self._samples.clear()
+        self.started_at = datetime.now()
+
+    def summary(self) -> dict[str, dict]:
+        """Per-stage count and p50/p95/p99/max in milliseconds"""
+        ordered = [s for s in STAGES if s in self._samples] + sorted(set(self._samples) - set(STAGES))
+        result = {}
+        for stage in ordered:
+            samples = sorted(self._samples[stage])
+            result[stage] = {
+                "count": len(samples),
+                "p50": percentile(samples, 50) * 1000,
+                "p95": percentile(samples, 95) * 1000,
+                "p99": percentile(samples, 99) * 1000,
+                "max": samples[-1] * 1000,
+            }
+        return result
+
+    def count(self, stage: str) -> int:
+        samples = self._samples.get(stage)
+        return len(samples) if samples else 0
+
+    def p95(self, stage: str) -> Optional[float]:
+        """95th percentile in seconds, None without samples"""
+        samples = self._samples.get(stage)
+        if not samples:
+            return None
+        return percentile(sorted(samples), 95)
+
+    def report(self) -> str:
+        lines = [f"{'stage':<10} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+        for stage, s in self.summary().items():
+            lines.append(
+                f"{stage:<10} {s['count']:>6} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['p99']:>8.1f} {s['max']:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def export(self, path: str = config.LATENCY_EXPORT_PATH, extra: Optional[dict] = None) -> str:
+        """Write the summary as JSON; returns the path written"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {
+            "exported_at": datetime.now().isoformat(),
+            "since": self.started_at.isoformat(),
+            "window": self.window,
+            "stages": self.summary(),
+            **(extra or {}),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
@@ -1,18 +1,80 @@
+import json
 from dataclasses import dataclass
-from typing import Optional
+from decimal import Decimal
+from typing import Optional, Union
+from datetime import datetime
 
-@dataclass
+ZERO = Decimal(0)
+
+
+def money(value) -> Optional[Decimal]:
+    """
+    Exact amount from an API, SQLite or JSON value. Floats go through their
+    shortest repr, so 9.99 stays 9.99 instead of 9.9900000000000002131...
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+@dataclass(frozen=True, slots=True)
 class ProductInfo:
     name: str
     measurement: str
-    price: float
-    discount_price: Optional[float] = None
+    price: Decimal
+    discount_price: Optional[Decimal] = None
+    # Set when the answer came from the local catalog snapshot
+    catalog_as_of: Optional[datetime] = None
+    # Codes the API suggests are scanned next (e.g. shelf neighbours), used for prefetch
+    related: tuple[str, ...] = ()
 
     @classmethod
-    def from_dict(cls, data: dict):
+    def from_dict(cls, data: dict) -> "ProductInfo":
+        # The API spells it discountPrice, history saved by older versions discount_price
+        discount = data.get("discountPrice", data.get("discount_price"))
+        related = data.get("related")
         return cls(
-            name=data.get('name', ''),
-            measurement=data.get('measurement', ''),
-            price=float(data.get('price', 0)),
-            discount_price=float(data.get('discountPrice', 0)) if data.get('discountPrice') else None
-        ) 
\ No newline at end of file
+            name=data.get("name", ""),
+            measurement=data.get("measurement", ""),
+            price=money(data.get("price")) or ZERO,
+            discount_price=money(discount) or None,
+            related=tuple(related) if related else (),
+        )
+
+    def to_dict(self) -> dict:
+        """API spelling, JSON-ready; used for history entries and catalog rows"""
+        return {
+            "name": self.name,
+            "measurement": self.measurement,
+            "price": float(self.price),
+            "discountPrice": float(self.discount_price) if self.discount_price is not None else None,
+        }
+
+
+# Decoding goes straight from the response body to records: JSON numbers are
+# read as Decimal, never as an intermediate float
+
+def decode_product(body: Union[bytes, str]) -> ProductInfo:
+    """Single product payload (GET /products/{code})"""
+    return ProductInfo.from_dict(json.loads(body, parse_float=Decimal))
+
+
+def decode_products(
+    body: Union[bytes, str],
+) -> list[tuple[str, Optional[ProductInfo], Optional[str], Optional[str]]]:
+    """
+    Batch payload (GET /products?codes=...)
+    Returns: (barcode, product, etag, error) per item, in response order
+    """
+    items = json.loads(body, parse_float=Decimal)["items"]
+    return [
+        (
+            item["barcode"],
+            ProductInfo.from_dict(item["product"]) if item.get("product") is not None else None,
+            item.get("etag"),
+            None if item.get("product") is not None else item.get("error", "Not found"),
+        )
+        for item in items
+    ]
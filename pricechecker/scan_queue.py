@@ -0,0 +1,99 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from . import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_scans (
+    barcode TEXT PRIMARY KEY,
+    queued_at TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pending_scans_due ON pending_scans (next_attempt_at);
+"""
+
+
+class ScanQueue:
+    """
+    Durable queue of scans whose lookup failed because the API was unreachable.
+    A barcode is queued once (repeat scans keep the first scan time) and stays
+    until a resync gets an answer for it; failed resyncs back off per code.
+    Callers on the event loop go through asyncio.to_thread, the lock keeps
+    their transactions on the shared connection apart.
+    """
+
+    def __init__(self, db_path: str = config.DB_PATH, backoff_max: float = config.RESYNC_BACKOFF_MAX):
+        self.db_path = db_path
+        self.backoff_max = backoff_max
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                if os.path.dirname(self.db_path):
+                    os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(SCHEMA)
+            return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_scans").fetchone()[0]
+
+    def __contains__(self, barcode: str) -> bool:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM pending_scans WHERE barcode = ?", (barcode,)
+            ).fetchone() is not None
+
+    def add(self, barcode: str, queued_at: Optional[str] = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO pending_scans (barcode, queued_at) VALUES (?, ?)",
+                (barcode, queued_at or datetime.now().isoformat()),
+            )
+
+    def due(self, limit: int, now: Optional[float] = None) -> list[tuple[str, str]]:
+        """Oldest scans whose backoff has passed, as (barcode, queued_at)"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT barcode, queued_at FROM pending_scans WHERE next_attempt_at <= ? "
+                "ORDER BY queued_at LIMIT ?",
+                (time.time() if now is None else now, limit),
+            ).fetchall()
+
+    def resolve(self, barcodes: list[str]):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM pending_scans WHERE barcode = ?", ((b,) for b in barcodes))
+
+    def retry_later(self, barcodes: list[str], error: str):
+        """Push the next attempt out with jittered exponential backoff"""
+        now = time.time()
+        with self._lock, self.conn:
+            for barcode in barcodes:
+                row = self.conn.execute(
+                    "SELECT attempts FROM pending_scans WHERE barcode = ?", (barcode,)
+                ).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                delay = random.uniform(0.5, 1.0) * min(self.backoff_max, config.RESYNC_INTERVAL * 2 ** attempts)
+                self.conn.execute(
+                    "UPDATE pending_scans SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE barcode = ?",
+                    (attempts, now + delay, error, barcode),
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
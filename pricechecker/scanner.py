@@ -0,0 +1,110 @@
+import time
+from typing import Callable, Optional
+from pricechecker.config import SCAN_TIMEOUT, MIN_SCAN_LENGTH, MAX_SCAN_LENGTH
+
+# Keys a scanner sends after the code (suffix)
+TERMINATOR_KEYS = {"Enter", "Numpad Enter", "Tab"}
+
+
+def key_to_char(key: str) -> Optional[str]:
+    """Map a Flet KeyboardEvent.key to the character it types, None for modifiers etc."""
+    if key.startswith("Numpad ") and len(key) == 8:
+        key = key[-1]
+    if len(key) == 1 and key.isprintable():
+        return key
+    return None
+
+
+class ScanAssembler:
+    """
+    Assembles HID keystroke bursts from a barcode scanner into complete codes.
+    A code counts as scanner input only if all of its keys arrived within
+    `timeout` seconds; slower input is a human typing and is dropped.
+    """
+
+    def __init__(
+        self,
+        timeout: float = SCAN_TIMEOUT,
+        min_length: int = MIN_SCAN_LENGTH,
+        max_length: int = MAX_SCAN_LENGTH,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.timeout = timeout
+        self.min_length = min_length
+        self.max_length = max_length
+        self.clock = clock
+        self.buffer: list[str] = []
+        self.started_at: Optional[float] = None
+        self.last_key_at: Optional[float] = None
+        # How long the last accepted burst took, first key to terminator
+        self.last_duration: Optional[float] = None
+        # Set while the on-screen scan field has focus, it receives the keys itself
+        self.field_focused = False
+
+    def apply_settings(self, settings):
+        """Take the timeout and length limits from the app Settings"""
+        self.timeout = settings.scan_timeout
+        self.min_length = settings.min_scan_length
+        self.max_length = settings.max_scan_length
+
+    # Flet on_focus / on_blur handlers of the scan field
+
+    def on_field_focus(self, _=None):
+        self.field_focused = True
+        self.reset()
+
+    def on_field_blur(self, _=None):
+        self.field_focused = False
+
+    def reset(self):
+        self.buffer.clear()
+        self.started_at = None
+        self.last_key_at = None
+
+    def feed(self, key: str) -> Optional[str]:
+        """
+        Process one key press
+        Returns: the complete code when a burst ends, otherwise None
+        """
+        now = self.clock()
+
+        # A long pause starts a new burst
+        if self.last_key_at is not None and now - self.last_key_at > self.timeout:
+            self.reset()
+
+        if key in TERMINATOR_KEYS:
+            return self.complete(now)
+
+        char = key_to_char(key)
+        if char is None:
+            return None
+
+        if not self.buffer:
+            self.started_at = now
+        self.buffer.append(char)
+        self.last_key_at = now
+
+        if len(self.buffer) > self.max_length:
+            self.reset()
+        return None
+
+    def feed_page_key(self, key: str) -> Optional[str]:
+        """
+        Process a key from the page-wide keyboard handler. Ignored while the
+        scan field is focused: it gets the same keys and submits on Enter.
+        """
+        if self.field_focused:
+            return None
+        return self.feed(key)
+
+    def complete(self, now: float) -> Optional[str]:
+        code = "".join(self.buffer)
+        started_at = self.started_at
+        self.reset()
+
+        if len(code) < self.min_length:
+            return None
+        if now - started_at > self.timeout:
+            return None
+        self.last_duration = now - started_at
+        return code
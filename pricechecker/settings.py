@@ -0,0 +1,95 @@
+import json
+from dataclasses import dataclass, asdict, fields
+from typing import Callable
+import flet as ft
+from .languages import TRANSLATIONS
+
+
+@dataclass(frozen=True)
+class Settings:
+    api_url: str = "http://127.0.0.1:8000"
+    api_key: str = ""
+    language: str = "ukr"
+    scan_timeout: float = 1.0
+    min_scan_length: int = 4
+    max_scan_length: int = 14
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Settings":
+        """Build settings from raw values (e.g. form fields), raising ValueError if invalid"""
+        values = {}
+        for field in fields(cls):
+            value = data.get(field.name)
+            if value is not None:
+                # Coerce to the declared type (str/float/int)
+                values[field.name] = field.type(value.strip() if isinstance(value, str) else value)
+        settings = cls(**values)
+        settings.validate()
+        return settings
+
+    def validate(self):
+        if not self.api_url.startswith(("http://", "https://")):
+            raise ValueError("API URL must start with http:// or https://")
+        if self.language not in TRANSLATIONS:
+            raise ValueError(f"Unknown language: {self.language}")
+        if self.scan_timeout <= 0:
+            raise ValueError("Scan timeout must be positive")
+        if self.min_scan_length < 1:
+            raise ValueError("Minimum scan length must be at least 1")
+        if self.max_scan_length < self.min_scan_length:
+            raise ValueError("Maximum scan length must not be less than minimum")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Called with (old, new) after settings are saved
+SettingsListener = Callable[[Settings, Settings], None]
+
+
+class SettingsStore:
+    """Single source of app settings: loaded once from client_storage, saved with change notifications"""
+
+    STORAGE_KEY = "app_settings"
+
+    def __init__(self):
+        self.settings = Settings()
+        self._listeners: list[SettingsListener] = []
+
+    def subscribe(self, listener: SettingsListener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: SettingsListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def load(self, page: ft.Page) -> Settings:
+        try:
+            saved = await page.client_storage.get_async(self.STORAGE_KEY)
+            if saved:
+                # Invalid stored values fall back to their defaults one by one
+                settings = self.settings
+                for key, value in json.loads(saved).items():
+                    try:
+                        settings = Settings.from_dict({**settings.to_dict(), key: value})
+                    except (ValueError, TypeError) as e:
+                        print(f"Ignoring saved setting {key}: {e}")
+                self.settings = settings
+                print(f"Loaded settings: {self.settings}")
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+        return self.settings
+
+    async def save(self, page: ft.Page, settings: Settings):
+        settings.validate()
+        await page.client_storage.set_async(self.STORAGE_KEY, json.dumps(settings.to_dict()))
+        print(f"Settings saved: {settings}")
+
+        old, self.settings = self.settings, settings
+        if old != settings:
+            for listener in list(self._listeners):
+                listener(old, settings)
+
+    def update(self, **changes) -> Settings:
+        """New validated settings with some values changed (not saved)"""
+        return Settings.from_dict({**self.settings.to_dict(), **changes})
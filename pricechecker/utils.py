@@ -1,8 +1,15 @@
 import flet as ft
+import time
 from datetime import datetime
 from .models import ProductInfo
 
-def create_history_item(barcode: str, product: ProductInfo, translations: dict, timestamp: datetime = None):
+def create_history_item(
+    barcode: str,
+    product: ProductInfo,
+    translations: dict,
+    timestamp: datetime = None,
+    entry_id: int = None,
+):
     if timestamp is None:
         timestamp = datetime.now()
     
@@ -31,5 +38,29 @@ def create_history_item(barcode: str, product: ProductInfo, translations: dict,
             expand=True
         ),
         width=None,
-        expand=True
-    )
\ No newline at end of file
+        expand=True,
+        # History log id, used for paging and scroll anchoring
+        key=f"h{entry_id}" if entry_id is not None else None,
+        data=entry_id,
+    )
+
+
+class StartupTimer:
+    """Records startup stages relative to app creation for a timing breakdown"""
+    
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.marks: list[tuple[str, float]] = []
+    
+    def mark(self, stage: str):
+        self.marks.append((stage, time.perf_counter()))
+    
+    def report(self) -> str:
+        lines = ["[STARTUP] timing breakdown:"]
+        previous = self.started_at
+        for stage, at in self.marks:
+            lines.append(
+                f"[STARTUP]   {stage:<22} +{(at - previous) * 1000:7.1f} ms  (at {(at - self.started_at) * 1000:7.1f} ms)"
+            )
+            previous = at
+        return "\n".join(lines)
@@ -0,0 +1,82 @@
+import pytest
+
+from pricechecker.barcode import INTERNAL, gtin_check_digit, normalize_code, parse_barcode
+from pricechecker.handlers import handle_scan, parse_scan
+
+
+@pytest.mark.parametrize("value, symbology", [
+    ("96385074", "EAN-8"),
+    ("036000291452", "UPC-A"),
+    ("4006381333931", "EAN-13"),
+    ("10012345678902", "GTIN-14"),
+])
+def test_gtin_normalized_to_14_digits(value, symbology):
+    barcode, error = parse_barcode(value)
+    assert error is None
+    assert barcode.symbology == symbology
+    assert barcode.code == value.zfill(14)
+    assert barcode.variable_measure is None
+
+
+def test_same_product_same_key():
+    # UPC-A and its EAN-13 form are one product
+    assert normalize_code("036000291452") == normalize_code("0036000291452")
+
+
+@pytest.mark.parametrize("value", ["96385075", "036000291453", "4006381333932", "10012345678903"])
+def test_bad_check_digit(value):
+    barcode, error = parse_barcode(value)
+    assert barcode is None
+    assert "check digit" in error
+
+
+def test_variable_weight():
+    item = "2112345"
+    value = item + "01250"
+    value += str(gtin_check_digit(value))
+    barcode, error = parse_barcode(value)
+    assert error is None
+    assert barcode.variable_measure == "weight"
+    assert barcode.measure_value == 1250
+    # Every weighing of the item looks up the same key
+    assert barcode.code == (item + "00000" + str(gtin_check_digit(item + "00000"))).zfill(14)
+
+
+def test_variable_price():
+    value = "2812345" + "00499"
+    value += str(gtin_check_digit(value))
+    barcode, error = parse_barcode(value)
+    assert error is None
+    assert barcode.variable_measure == "price"
+    assert barcode.measure_value == 499
+
+
+def test_other_2x_prefix_is_plain_ean13():
+    value = "2012345" + "00499"
+    value += str(gtin_check_digit(value))
+    barcode, error = parse_barcode(value)
+    assert error is None
+    assert barcode.variable_measure is None
+    assert barcode.code == value.zfill(14)
+
+
+@pytest.mark.parametrize("value", ["SKU-123", "1234567", "123456789"])
+def test_internal_code_passed_through(value):
+    barcode, error = parse_barcode(value)
+    assert error is None
+    assert barcode.symbology == INTERNAL
+    assert barcode.code == value
+
+
+def test_handle_scan_cleans_and_validates():
+    assert handle_scan(" 4006381333931\r\n") == ("04006381333931", None)
+    assert handle_scan("4006381333932")[0] is None
+    assert handle_scan("1", min_length=3)[0] is None
+
+
+def test_parse_scan_keeps_measure():
+    value = "2312345" + "00750"
+    value += str(gtin_check_digit(value))
+    barcode, error = parse_scan(value)
+    assert error is None
+    assert barcode.measure_value == 750
@@ -0,0 +1,33 @@
+import pytest
+
+from pricechecker.barcode import normalize_code
+from pricechecker.history import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(db_path=str(tmp_path / "scans.db"))
+    for code in ("036000291452", "96385074", "4006381333931", "SKU-1"):
+        store.append({
+            "barcode": normalize_code(code),
+            "product": {"name": f"Product {code}", "measurement": "pcs", "price": 1.5, "discountPrice": None},
+            "timestamp": "2026-10-18T12:00:00",
+        })
+    store.flush()
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("036000291452", "00036000291452"),  # UPC-A, 2 zeros of padding
+    ("96385074", "00000096385074"),  # EAN-8, 6 zeros of padding
+    ("4006381333931", "04006381333931"),
+    ("3600029", "00036000291452"),  # prefix after the padding
+    ("963", "00000096385074"),
+])
+def test_barcode_search_sees_through_padding(store, query, expected):
+    assert [entry["barcode"] for entry in store.page(10, query=query)] == [expected]
+
+
+def test_name_search(store):
+    assert [entry["barcode"] for entry in store.page(10, query="SKU")] == ["SKU-1"]
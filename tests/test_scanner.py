@@ -0,0 +1,34 @@
+from pricechecker.scanner import ScanAssembler
+
+
+def make_assembler():
+    now = [0.0]
+    assembler = ScanAssembler(timeout=1.0, min_length=4, max_length=14, clock=lambda: now[0])
+
+    def type_keys(keys, gap=0.01, feed=assembler.feed_page_key):
+        result = None
+        for key in keys:
+            now[0] += gap
+            result = feed(key) or result
+        return result
+
+    return assembler, type_keys
+
+
+def test_burst_is_assembled():
+    assembler, type_keys = make_assembler()
+    assert type_keys(list("4006381333931") + ["Enter"]) == "4006381333931"
+
+
+def test_slow_typing_is_dropped():
+    assembler, type_keys = make_assembler()
+    assert type_keys(list("4006381333931") + ["Enter"], gap=0.3) is None
+
+
+def test_keys_ignored_while_field_focused():
+    assembler, type_keys = make_assembler()
+    type_keys(list("4006"))
+    assembler.on_field_focus()
+    assert type_keys(list("381333931") + ["Enter"]) is None
+    assembler.on_field_blur()
+    assert type_keys(list("96385074") + ["Enter"]) == "96385074"